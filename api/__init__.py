@@ -3,49 +3,26 @@
 from __future__ import annotations
 
 import asyncio
-import platform
-import sys
-import types
 import uuid
 from contextlib import asynccontextmanager
+from pathlib import Path
 
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import update
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.sessions import SessionMiddleware
 
-# Stub modules.core so face_swapper/face_enhancer don't pull in tensorflow
-if "modules.core" not in sys.modules:
-    _core_stub = types.ModuleType("modules.core")
-
-    def _update_status(message: str, scope: str = "DLC.API") -> None:
-        print(f"[{scope}] {message}")
-
-    _core_stub.update_status = _update_status  # type: ignore[attr-defined]
-    sys.modules["modules.core"] = _core_stub
-
+# Must come first: stubs modules.core so face_swapper/face_enhancer don't pull in tensorflow
+from modules.headless import warm_models
+from modules.video_io import pick_encoder
 from api.config import settings
-from api.database import init_db
-from api.queue import job_queue
+from api.database import async_session, init_db
+from api.models import Job
+from api.queue import SHUTDOWN_ERROR, job_queue
 from api.storage import cleanup_old_results
 
-
-def _configure_globals() -> None:
-    """Set modules.globals for headless API mode."""
-    import modules.globals
-
-    modules.globals.headless = True
-    modules.globals.many_faces = False
-    modules.globals.map_faces = False
-    modules.globals.mouth_mask = False
-    modules.globals.poisson_blend = False
-
-    if platform.system() == "Darwin" and platform.machine() == "arm64":
-        modules.globals.execution_providers = [
-            "CoreMLExecutionProvider",
-            "CPUExecutionProvider",
-        ]
-    else:
-        modules.globals.execution_providers = ["CPUExecutionProvider"]
+SHUTDOWN_GRACE = 10.0  # seconds to let the running video job finish on shutdown
 
 
 async def _periodic_cleanup(interval: int = 3600) -> None:
@@ -53,25 +30,38 @@ async def _periodic_cleanup(interval: int = 3600) -> None:
     while True:
         await asyncio.sleep(interval)
         try:
-            deleted = cleanup_old_results()
+            # Blocking file I/O; keep it off the event loop
+            deleted = await run_in_threadpool(cleanup_old_results)
             if deleted:
                 print(f"[cleanup] Removed {deleted} expired result files")
         except Exception as exc:
             print(f"[cleanup] Error: {exc}")
 
 
+async def _fail_unstarted_jobs() -> None:
+    """Record jobs the queue dropped on shutdown as failed, not queued forever."""
+    job_ids = job_queue.unstarted_jobs()
+    if not job_ids:
+        return
+    async with async_session() as db:
+        await db.execute(
+            update(Job).where(Job.id.in_(job_ids)).values(status="failed", error=SHUTDOWN_ERROR)
+        )
+        await db.commit()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    Path(settings.storage_path).mkdir(parents=True, exist_ok=True)
+
     # Init database
     await init_db()
 
-    # Configure ML globals and warm up models
-    _configure_globals()
-    from modules.face_analyser import get_face_analyser
-    from modules.processors.frame.face_swapper import get_face_swapper
-
-    get_face_analyser()
-    get_face_swapper()
+    # Configure ML globals and warm up models (no-op if already warmed). Off
+    # the event loop: loading and the warm-up inference take seconds.
+    await run_in_threadpool(warm_models, settings.inference_precision)
+    # Probe ffmpeg's encoders now rather than on the first video job
+    await run_in_threadpool(pick_encoder)
 
     # Start job queue worker
     job_queue.start()
@@ -82,6 +72,9 @@ async def lifespan(app: FastAPI):
     yield
 
     cleanup_task.cancel()
+    job_queue.stop()
+    await run_in_threadpool(job_queue.join, SHUTDOWN_GRACE)
+    await _fail_unstarted_jobs()
 
 
 app = FastAPI(
@@ -6,17 +6,20 @@ from datetime import datetime, timedelta, timezone
 
 from fastapi import Cookie, Depends, Request
 from jose import JWTError, jwt
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.config import settings
 from api.database import get_db
 from api.models import User
 
+# Settings are fixed once the process starts, so derive these once
+_JWT_TTL = timedelta(hours=settings.jwt_expire_hours)
+_AUTH_CONFIGURED = bool(settings.google_client_id and settings.google_client_secret)
+
 
 def create_jwt(user_id: str, email: str) -> str:
     """Create a signed JWT for the given user."""
-    expire = datetime.now(timezone.utc) + timedelta(hours=settings.jwt_expire_hours)
+    expire = datetime.now(timezone.utc) + _JWT_TTL
     payload = {"sub": user_id, "email": email, "exp": expire}
     return jwt.encode(payload, settings.jwt_secret, algorithm=settings.jwt_algorithm)
 
@@ -45,10 +48,10 @@ async def get_current_user(
     payload = decode_jwt(token)
     if not payload or "sub" not in payload:
         return None
-    result = await db.execute(select(User).where(User.id == payload["sub"]))
-    return result.scalar_one_or_none()
+    # Primary-key lookup: served from the session's identity map if already loaded
+    return await db.get(User, payload["sub"])
 
 
 def auth_configured() -> bool:
     """Check if Google OAuth credentials are configured."""
-    return bool(settings.google_client_id and settings.google_client_secret)
+    return _AUTH_CONFIGURED
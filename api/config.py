@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 import secrets
-from pathlib import Path
+from typing import Literal
 
 from pydantic_settings import BaseSettings
 
@@ -28,6 +28,22 @@ class Settings(BaseSettings):
     stripe_webhook_secret: str = ""
     stripe_price_id: str = ""
 
+    # --- Inference ---
+    # Face swapper weights: "fp16" | "fp32"; empty = fp16 on CUDA, fp32 otherwise
+    inference_precision: Literal["", "fp16", "fp32"] = ""
+
+    # --- Video jobs ---
+    # CPUs for the job queue worker, e.g. "2,3" or "4-7" (Linux only); empty = any.
+    # Pipeline threads started by the worker inherit the same set.
+    worker_cpus: str = ""
+    # Worker processes per tier (premium/free), each with its own model
+    # sessions; 0 runs jobs on the queue's worker thread. Off by default since
+    # every process holds a full copy of the models in (V)RAM.
+    video_processes: int = 0
+    # Frames per batched face-detection call; <= 1 disables batching. Only
+    # used when the detector model has a dynamic batch dimension.
+    detect_batch: int = 8
+
     # --- Limits ---
     max_image_bytes: int = 10 * 1024 * 1024  # 10 MB
     max_video_bytes_free: int = 25 * 1024 * 1024  # 25 MB
@@ -48,6 +64,3 @@ class Settings(BaseSettings):
 
 
 settings = Settings()
-
-# Ensure storage directory exists
-Path(settings.storage_path).mkdir(parents=True, exist_ok=True)
@@ -2,19 +2,60 @@
 
 from __future__ import annotations
 
+from pathlib import Path
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from api.config import settings
 from api.models import Base
 
-engine = create_async_engine(settings.database_url, echo=False)
+_url = make_url(settings.database_url)
+_is_sqlite = _url.get_backend_name() == "sqlite"
+
+# Keep connections open between requests instead of connecting per session.
+# aiosqlite file databases default to NullPool; in-memory ones need their
+# default StaticPool, so leave those alone.
+if _is_sqlite:
+    _pool_kwargs = (
+        {"poolclass": AsyncAdaptedQueuePool, "pool_size": 5, "max_overflow": 10}
+        if _url.database not in (None, "", ":memory:")
+        else {}
+    )
+else:
+    _pool_kwargs = {"pool_size": 10, "max_overflow": 20, "pool_pre_ping": True, "pool_recycle": 1800}
+
+engine = create_async_engine(settings.database_url, echo=False, **_pool_kwargs)
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+if _is_sqlite:
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _sqlite_pragmas(dbapi_conn, _record) -> None:
+        cursor = dbapi_conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA cache_size=-64000")  # 64 MB page cache per connection
+        cursor.close()
+
+
+def _create_indexes(sync_conn) -> None:
+    # create_all skips tables that already exist, so indexes added to the
+    # models later would never reach an existing database without this.
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True)
+
 
 async def init_db() -> None:
-    """Create all tables if they don't exist."""
+    """Create all tables and indexes if they don't exist."""
+    if _is_sqlite and _url.database not in (None, "", ":memory:"):
+        Path(_url.database).parent.mkdir(parents=True, exist_ok=True)
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_create_indexes)
 
 
 async def get_db() -> AsyncSession:  # type: ignore[misc]
@@ -2,10 +2,12 @@
 
 from __future__ import annotations
 
-import uuid
-from datetime import datetime, timezone
+import os
+import threading
+import time
+from datetime import date, datetime, timezone
 
-from sqlalchemy import JSON, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import JSON, Date, DateTime, ForeignKey, Index, Integer, String, Text, text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -13,8 +15,36 @@ def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
 
-def _new_id() -> str:
-    return uuid.uuid4().hex
+_ID_POOL_BYTES = 4096  # random bytes fetched per os.urandom() call
+_id_pool = b""
+_id_off = 0
+_id_lock = threading.Lock()
+
+
+def _reset_id_pool() -> None:
+    # A forked child must not hand out the parent's remaining random bytes
+    global _id_pool, _id_off
+    _id_pool, _id_off = b"", 0
+
+
+if hasattr(os, "register_at_fork"):  # Unix only; nothing forks on Windows
+    os.register_at_fork(after_in_child=_reset_id_pool)
+
+
+def new_id() -> str:
+    """Time-ordered 128-bit ID as 32 hex chars (ULID layout).
+
+    48-bit millisecond timestamp followed by 80 random bits, so primary-key
+    inserts land near the end of the index. Same width as ``uuid4().hex``,
+    so existing String(32) columns still fit.
+    """
+    global _id_pool, _id_off
+    with _id_lock:
+        if _id_off + 10 > len(_id_pool):
+            _id_pool, _id_off = os.urandom(_ID_POOL_BYTES), 0
+        rand = _id_pool[_id_off:_id_off + 10]
+        _id_off += 10
+    return (time.time_ns() // 1_000_000).to_bytes(6, "big").hex() + rand.hex()
 
 
 class Base(DeclarativeBase):
@@ -24,12 +54,14 @@ class Base(DeclarativeBase):
 class User(Base):
     __tablename__ = "users"
 
-    id: Mapped[str] = mapped_column(String(32), primary_key=True, default=_new_id)
+    id: Mapped[str] = mapped_column(String(32), primary_key=True, default=new_id)
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True)
     name: Mapped[str] = mapped_column(String(255), default="")
     google_id: Mapped[str | None] = mapped_column(String(255), default=None)
     tier: Mapped[str] = mapped_column(String(20), default="free")  # free | premium
-    stripe_customer_id: Mapped[str | None] = mapped_column(String(255), default=None)
+    stripe_customer_id: Mapped[str | None] = mapped_column(
+        String(255), index=True, default=None
+    )
     stripe_subscription_id: Mapped[str | None] = mapped_column(String(255), default=None)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow)
 
@@ -39,8 +71,12 @@ class User(Base):
 
 class Job(Base):
     __tablename__ = "jobs"
+    __table_args__ = (
+        # /user/history: a user's recent jobs, newest first
+        Index("ix_jobs_user_time", "user_id", "created_at"),
+    )
 
-    id: Mapped[str] = mapped_column(String(32), primary_key=True, default=_new_id)
+    id: Mapped[str] = mapped_column(String(32), primary_key=True, default=new_id)
     user_id: Mapped[str | None] = mapped_column(
         String(32), ForeignKey("users.id"), nullable=True, default=None
     )
@@ -60,6 +96,17 @@ class Job(Base):
 
 class UsageRecord(Base):
     __tablename__ = "usage_records"
+    __table_args__ = (
+        # Daily usage counts in check_usage_limit and /user/usage
+        Index("ix_usage_user_type_time", "user_id", "job_type", "created_at"),
+        # Anonymous usage only: skips logged-in rows, which that path never
+        # counts. Trailing user_id lets SQLite answer the count from the index.
+        Index(
+            "ix_usage_anon_session_type_time", "session_id", "job_type", "created_at", "user_id",
+            sqlite_where=text("user_id IS NULL"),
+            postgresql_where=text("user_id IS NULL"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[str | None] = mapped_column(
@@ -70,3 +117,18 @@ class UsageRecord(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow)
 
     user: Mapped[User | None] = relationship(back_populates="usage_records")
+
+
+class DailyUsage(Base):
+    """Running per-day swap count, bumped alongside each UsageRecord.
+
+    Lets check_usage_limit read one row by primary key instead of counting
+    usage_records, which stay the full audit log.
+    """
+
+    __tablename__ = "daily_usage"
+
+    owner: Mapped[str] = mapped_column(String(80), primary_key=True)  # user:<id> | session:<cookie>
+    usage_date: Mapped[date] = mapped_column(Date, primary_key=True)  # UTC day
+    job_type: Mapped[str] = mapped_column(String(10), primary_key=True)  # image | video
+    count: Mapped[int] = mapped_column(Integer, default=0)
@@ -2,16 +2,53 @@
 
 from __future__ import annotations
 
+import functools
+import heapq
+import itertools
+import multiprocessing
 import os
 import queue
 import threading
 import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from datetime import datetime, timezone
+from typing import Callable
 
 import cv2
 
 from api.config import settings
-from api.storage import result_path
+from api.storage import result_path, track_result
+from modules.video_io import open_reader, open_writer
+
+INBOUND_SHARDS = 4  # enqueue shards, picked by hash(job_id)
+PIPELINE_DEPTH = 8  # frames buffered between decode, swap and encode
+PROGRESS_REPORT_INTERVAL = 0.25  # seconds between frame counts sent from pool processes
+SHUTDOWN_ERROR = "Server shut down before the job started"
+
+
+def _parse_cpus(spec: str) -> set[int]:
+    """Parse a CPU list like "0,2,4-7" into a set of CPU ids."""
+    cpus: set[int] = set()
+    for part in spec.split(","):
+        first, _, last = part.strip().partition("-")
+        cpus.update(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+def _pin_to_worker_cpus() -> None:
+    """Keep the calling thread on settings.worker_cpus, if configured.
+
+    Staying on the same cores keeps frame buffers warm in their caches
+    instead of migrating between CPUs mid-job.
+    """
+    if not settings.worker_cpus or not hasattr(os, "sched_setaffinity"):
+        return
+    try:
+        # pid 0 = the calling thread on Linux
+        os.sched_setaffinity(0, _parse_cpus(settings.worker_cpus))
+    except (ValueError, OSError) as exc:
+        print(f"[queue] Ignoring worker_cpus={settings.worker_cpus!r}: {exc}")
 
 
 class _JobItem:
@@ -34,30 +71,97 @@ class _JobItem:
 class JobQueue:
     """Single-worker priority queue for video processing jobs.
 
-    Priority 0 = premium (processed first), 1 = free.
+    Priority 0 = premium (processed first), 1 = free. By default jobs run one
+    at a time on the worker thread; with settings.video_processes > 0 the worker
+    instead dispatches them to per-tier process pools.
     """
 
     def __init__(self) -> None:
-        self._q: queue.PriorityQueue[_JobItem] = queue.PriorityQueue()
-        self._seq = 0
-        self._lock = threading.Lock()
+        # Producers append to an inbound shard (deque.append is atomic), so
+        # concurrent enqueues never share a lock; only the worker thread
+        # drains the shards into _heap, which it owns.
+        self._inbound: list[deque[_JobItem]] = [deque() for _ in range(INBOUND_SHARDS)]
+        self._heap: list[_JobItem] = []
+        self._seq = itertools.count(1)
+        # Set after every enqueue/stop; the worker sleeps on it until there is work
+        self._wakeup = threading.Event()
+        self._shutdown = False
         self._worker: threading.Thread | None = None
+        # Per-tier process pools and their shared progress queue (video_processes > 0)
+        self._pools: dict[int, ProcessPoolExecutor] | None = None
+        self._progress_q = None
+        self._cancelled: list[_JobItem] = []  # pool jobs cancelled by stop()
         # In-memory job state for progress tracking (mirrors DB but avoids async)
         self._job_state: dict[str, dict] = {}
         self._state_lock = threading.Lock()
+        # Per-job processed-frame counters (1-element lists). Written every
+        # frame and read by status polls without the lock; int stores are
+        # atomic, so readers just see the latest count.
+        self._progress: dict[str, list[int]] = {}
 
     def start(self) -> None:
-        """Start the background worker thread."""
+        """Start the background worker thread (and process pools, if enabled)."""
         if self._worker is not None and self._worker.is_alive():
             return
+        self._shutdown = False
+        if settings.video_processes > 0 and self._pools is None:
+            # spawn, not fork: forking after ONNX Runtime/CUDA init is unsafe
+            ctx = multiprocessing.get_context("spawn")
+            self._progress_q = ctx.Queue()
+            # One pool per tier so premium jobs never wait behind free ones
+            self._pools = {
+                priority: ProcessPoolExecutor(
+                    max_workers=settings.video_processes, mp_context=ctx,
+                    initializer=_init_process, initargs=(self._progress_q,),
+                )
+                for priority in (0, 1)
+            }
+            threading.Thread(
+                target=self._pump_progress, args=(self._progress_q,), daemon=True
+            ).start()
+        self._wakeup.set()  # pick up anything enqueued while stopped
         self._worker = threading.Thread(target=self._run, daemon=True)
         self._worker.start()
 
+    def stop(self) -> None:
+        """Ask the worker to exit once the job in hand is done.
+
+        Jobs already handed to the process pools are cancelled if not yet
+        running; see unstarted_jobs() for what was left behind.
+        """
+        self._shutdown = True
+        self._wakeup.set()
+        if self._pools is not None:
+            for pool in self._pools.values():
+                pool.shutdown(wait=False, cancel_futures=True)
+            self._progress_q.put(None)
+            self._pools = None
+
+    def join(self, timeout: float | None = None) -> None:
+        """Wait for the worker thread to exit after stop()."""
+        if self._worker is not None:
+            self._worker.join(timeout)
+
+    def unstarted_jobs(self) -> list[str]:
+        """Fail and return the jobs stop() left unrun (call after join()).
+
+        Covers jobs still queued and pool jobs cancelled before they started.
+        Their uploaded inputs are deleted; the caller records the failure in
+        the database, which would otherwise show them queued forever.
+        """
+        self._drain()
+        items = self._heap + self._cancelled
+        self._heap, self._cancelled = [], []
+        for item in items:
+            self._update(item.job_id, status="failed", error=SHUTDOWN_ERROR)
+            try:
+                os.unlink(item.payload["tmp_in"])
+            except (KeyError, OSError):
+                pass
+        return [item.job_id for item in items]
+
     def enqueue(self, job_id: str, priority: int, payload: dict) -> None:
         """Add a job to the queue."""
-        with self._lock:
-            self._seq += 1
-            seq = self._seq
         with self._state_lock:
             self._job_state[job_id] = {
                 "status": "queued",
@@ -65,111 +169,305 @@ class JobQueue:
                 "processed_frames": 0,
                 "error": None,
             }
-        self._q.put(_JobItem(priority, seq, job_id, payload))
+        self._progress[job_id] = [0]
+        shard = self._inbound[hash(job_id) % INBOUND_SHARDS]
+        shard.append(_JobItem(priority, next(self._seq), job_id, payload))
+        self._wakeup.set()
 
     def get_state(self, job_id: str) -> dict | None:
         """Get current in-memory job state."""
         with self._state_lock:
-            return self._job_state.get(job_id, {}).copy() or None
+            state = self._job_state.get(job_id, {}).copy() or None
+        if state is not None:
+            state["processed_frames"] = self._progress[job_id][0]
+        return state
 
     def _update(self, job_id: str, **kw) -> None:
+        if "processed_frames" in kw:
+            counter = self._progress.get(job_id)
+            if counter is not None:
+                counter[0] = kw.pop("processed_frames")
+        if not kw:
+            return
+        if kw.get("result_path"):
+            track_result(kw["result_path"])
         with self._state_lock:
             if job_id in self._job_state:
                 self._job_state[job_id].update(kw)
 
+    def _drain(self) -> None:
+        """Move inbound jobs onto the worker-owned heap (worker thread only)."""
+        for shard in self._inbound:
+            while shard:
+                heapq.heappush(self._heap, shard.popleft())
+
+    def _process_local(self, item: _JobItem) -> None:
+        """Run a job on the worker thread."""
+        counter = self._progress[item.job_id]
+
+        def set_progress(processed: int) -> None:
+            counter[0] = processed
+
+        _process_job(item.job_id, item.payload, self._update, set_progress)
+
+    def _submit(self, item: _JobItem) -> None:
+        """Hand a job to the process pool for its tier."""
+        pool = self._pools[0 if item.priority == 0 else 1]
+        fut = pool.submit(_process_in_pool, item.job_id, item.payload)
+        fut.add_done_callback(functools.partial(self._pool_job_done, item))
+
+    def _pool_job_done(self, item: _JobItem, fut: Future) -> None:
+        if fut.cancelled():
+            self._cancelled.append(item)
+        # Only reached with an exception if the pool itself broke (e.g. a
+        # worker process died); job errors arrive through the progress queue.
+        elif fut.exception() is not None:
+            self._update(item.job_id, status="failed", error=str(fut.exception()))
+
+    def _pump_progress(self, progress_q) -> None:
+        """Apply progress reported by pool processes to the in-memory state."""
+        while (msg := progress_q.get()) is not None:
+            job_id, kw = msg
+            self._update(job_id, **kw)
+
     def _run(self) -> None:
         """Worker loop: pull jobs from queue and process them."""
+        _pin_to_worker_cpus()
         while True:
+            self._wakeup.wait()
+            # Clear before draining so an enqueue racing with the drain re-arms it
+            self._wakeup.clear()
+            self._drain()
+            while self._heap and not self._shutdown:
+                item = heapq.heappop(self._heap)
+                if self._pools is not None:
+                    self._submit(item)
+                    continue
+                try:
+                    self._process_local(item)
+                except Exception as exc:
+                    self._update(item.job_id, status="failed", error=str(exc))
+                # Let premium jobs that arrived meanwhile jump ahead
+                self._drain()
+            if self._shutdown:
+                return
+
+
+def _process_job(
+    job_id: str, p: dict, update: Callable[..., None], set_progress: Callable[[int], None]
+) -> None:
+    """Swap faces through one queued video.
+
+    State changes go through ``update``; the per-frame count goes through
+    the cheaper ``set_progress``. The uploaded input is always deleted, the
+    reader and writer are released however the job ends, and the output
+    file is kept only if the job succeeds.
+    """
+    update(job_id, status="processing")
+    tmp_in = p["tmp_in"]
+    out_path = None
+    processed = 0
+    try:
+        cap = open_reader(tmp_in)
+        try:
+            if not cap.isOpened():
+                update(job_id, status="failed", error="Could not open target video")
+                return
+
+            total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or 0
+            fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            update(job_id, total_frames=total)
+
+            out_path = result_path(job_id, ".mp4")
+            writer = open_writer(out_path, fps, (width, height))
+            if not writer.isOpened():
+                update(job_id, status="failed", error="Failed to create output video writer")
+                return
+
             try:
-                item = self._q.get(timeout=5)
-            except queue.Empty:
+                swapped = _swap_frames(cap, writer, p, set_progress)
+            except BaseException:
+                # Still close the writer (ffmpeg's stdin) so its process
+                # exits now; the original error is the one to report
+                try:
+                    writer.release()
+                except Exception:
+                    pass
+                raise
+            writer.release()  # may still fail, e.g. ffmpeg exiting non-zero
+            processed = swapped
+        finally:
+            cap.release()
+    finally:
+        # A failed job's partial output is never tracked for expiry, so it
+        # has to go now
+        for path in (tmp_in, out_path if processed == 0 else None):
+            if path is None:
                 continue
             try:
-                self._process(item)
-            except Exception as exc:
-                self._update(item.job_id, status="failed", error=str(exc))
-            finally:
-                self._q.task_done()
-
-    def _process(self, item: _JobItem) -> None:
-        job_id = item.job_id
-        p = item.payload
-        self._update(job_id, status="processing")
-
-        source_face = p["source_face"]
-        tmp_in = p["tmp_in"]
-        many_faces = p.get("many_faces", False)
-        enhance = p.get("enhance", False)
-
-        # Lazy imports to avoid circular deps
-        from modules.face_analyser import get_many_faces, get_one_face
-        from modules.processors.frame.face_swapper import swap_face
-
-        cap = cv2.VideoCapture(tmp_in)
-        if not cap.isOpened():
-            self._update(job_id, status="failed", error="Could not open target video")
-            return
+                os.unlink(path)
+            except OSError:
+                pass
 
-        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or 0
-        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        self._update(job_id, total_frames=total)
+    if processed == 0:
+        update(job_id, status="failed", error="Video contained no readable frames")
+        return
 
-        out_path = result_path(job_id, ".mp4")
-        fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-        writer = cv2.VideoWriter(out_path, fourcc, fps, (width, height))
-        if not writer.isOpened():
-            cap.release()
-            self._update(job_id, status="failed", error="Failed to create output video writer")
-            return
+    update(job_id, status="done", processed_frames=processed, result_path=out_path)
 
-        enhance_fn = None
-        if enhance:
-            try:
-                from modules.processors.frame.face_enhancer import enhance_face
-                enhance_fn = enhance_face
-            except Exception:
-                pass
 
-        processed = 0
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
+def _swap_frames(cap, writer, p: dict, set_progress: Callable[[int], None]) -> int:
+    """Run the decode/swap/encode pipeline from *cap* to *writer*; returns frames written."""
+    source_face = p["source_face"]
+    many_faces = p.get("many_faces", False)
+    enhance = p.get("enhance", False)
 
+    # Lazy imports to avoid circular deps
+    from modules.face_analyser import (
+        detector_supports_batch,
+        get_many_faces,
+        get_many_faces_batch,
+        get_one_face,
+    )
+    from modules.processors.frame.face_swapper import swap_face
+
+    enhance_fn = None
+    if enhance:
+        try:
+            from modules.processors.frame.face_enhancer import enhance_face
+            enhance_fn = enhance_face
+        except Exception:
+            pass
+
+    def detect(frames: list) -> list:
+        """Faces to swap for each frame, from one detector call when batched."""
+        if batch_size > 1:
+            found = get_many_faces_batch(frames)
             if many_faces:
-                faces = get_many_faces(frame)
+                return found
+            # Same pick as get_one_face(): left-most face
+            return [[min(f, key=lambda x: x.bbox[0])] if f else None for f in found]
+        if many_faces:
+            return [get_many_faces(frame) for frame in frames]
+        return [[one] if (one := get_one_face(frame)) else None for frame in frames]
+
+    # Three-stage pipeline: a reader thread decodes ahead, this thread runs
+    # detect/swap/enhance, and a writer thread encodes behind. cv2, PyAV and
+    # ONNX Runtime release the GIL, so the stages overlap.
+    decoded_q: queue.Queue = queue.Queue(maxsize=PIPELINE_DEPTH)
+    encoded_q: queue.Queue = queue.Queue(maxsize=PIPELINE_DEPTH)
+    stop_reading = threading.Event()
+    errors: list[BaseException] = []
+
+    def read_frames() -> None:
+        try:
+            while not stop_reading.is_set():
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                decoded_q.put(frame)
+        except BaseException as exc:
+            errors.append(exc)
+        finally:
+            decoded_q.put(None)
+
+    def write_frames() -> None:
+        while (frame := encoded_q.get()) is not None:
+            if errors:
+                continue  # keep draining so the producer never blocks
+            try:
+                writer.write(frame)
+            except BaseException as exc:
+                errors.append(exc)
+
+    reader = threading.Thread(target=read_frames, daemon=True)
+    writer_thread = threading.Thread(target=write_frames, daemon=True)
+    reader.start()
+    writer_thread.start()
+
+    # Take frames in windows of batch_size so detection runs once per window
+    detect_batch = settings.detect_batch
+    batch_size = detect_batch if detect_batch > 1 and detector_supports_batch() else 1
+    batch: list = []
+    processed = 0
+    eof = False
+    try:
+        while not eof and not errors:
+            frame = decoded_q.get()
+            if frame is not None:
+                batch.append(frame)
             else:
-                one = get_one_face(frame)
-                faces = [one] if one else None
+                eof = True
+            if not batch or (not eof and len(batch) < batch_size):
+                continue
 
-            if faces:
-                for tf in faces:
-                    frame = swap_face(source_face, tf, frame)
+            for frame, faces in zip(batch, detect(batch)):
+                if faces:
+                    for tf in faces:
+                        frame = swap_face(source_face, tf, frame)
+
+                if enhance_fn is not None:
+                    frame = enhance_fn(frame)
+
+                encoded_q.put(frame)
+                processed += 1
+                set_progress(processed)
+            batch = []
+    finally:
+        if not eof:
+            # Stopped early: let the reader see the flag, draining whatever
+            # it is blocked trying to hand over
+            stop_reading.set()
+            while decoded_q.get() is not None:
+                pass
+        encoded_q.put(None)
+        writer_thread.join()
+        reader.join()
 
-            if enhance_fn is not None:
-                frame = enhance_fn(frame)
+    if errors:
+        raise errors[0]
 
-            writer.write(frame)
-            processed += 1
-            self._update(job_id, processed_frames=processed)
+    return processed
 
-        cap.release()
-        writer.release()
 
-        # Clean up temp input file
-        try:
-            os.unlink(tmp_in)
-        except OSError:
-            pass
+# --- Process-pool workers (settings.video_processes > 0) ---
+_progress_q = None  # set in each pool process by _init_process()
 
-        if processed == 0:
-            self._update(job_id, status="failed", error="Video contained no readable frames")
-            return
 
-        self._update(job_id, status="done", processed_frames=processed,
-                     result_path=out_path)
+def _init_process(progress_q) -> None:
+    """Pool initializer: keep the progress queue and load models once per process."""
+    global _progress_q
+    _progress_q = progress_q
+    _pin_to_worker_cpus()
+    from modules.headless import warm_models
+
+    warm_models(settings.inference_precision)
+
+
+def _report(job_id: str, **kw) -> None:
+    _progress_q.put((job_id, kw))
+
+
+def _process_in_pool(job_id: str, payload: dict) -> None:
+    # Failures go through the progress queue too, so they can't overtake
+    # progress messages still in flight from this job.
+    last_report = 0.0
+
+    def set_progress(processed: int) -> None:
+        # Crossing the process boundary costs far more than a counter store,
+        # so send the frame count at most every PROGRESS_REPORT_INTERVAL.
+        nonlocal last_report
+        now = time.monotonic()
+        if now - last_report >= PROGRESS_REPORT_INTERVAL:
+            last_report = now
+            _report(job_id, processed_frames=processed)
+
+    try:
+        _process_job(job_id, payload, _report, set_progress)
+    except Exception as exc:
+        _report(job_id, status="failed", error=str(exc))
 
 
 # Module-level singleton
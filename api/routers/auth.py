@@ -10,10 +10,36 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from api.auth import auth_configured, create_jwt
 from api.config import settings
 from api.database import get_db
-from api.models import User
+from api.models import User, new_id
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+_JWT_COOKIE_MAX_AGE = settings.jwt_expire_hours * 3600
+
+_oauth = None  # authlib OAuth registry, built on first use
+
+
+def _get_oauth():
+    """Return the shared OAuth registry, registering the Google client once.
+
+    Reusing it also keeps the client's cached OpenID configuration, so
+    discovery is fetched once per process rather than once per request.
+    """
+    global _oauth
+    if _oauth is None:
+        from authlib.integrations.starlette_client import OAuth
+
+        oauth = OAuth()
+        oauth.register(
+            name="google",
+            client_id=settings.google_client_id,
+            client_secret=settings.google_client_secret,
+            server_metadata_url="https://accounts.google.com/.well-known/openid-configuration",
+            client_kwargs={"scope": "openid email profile"},
+        )
+        _oauth = oauth
+    return _oauth
+
 
 def _require_auth():
     if not auth_configured():
@@ -23,35 +49,14 @@ def _require_auth():
 @router.get("/google")
 async def google_login(request: Request):
     _require_auth()
-    from authlib.integrations.starlette_client import OAuth
-
-    oauth = OAuth()
-    oauth.register(
-        name="google",
-        client_id=settings.google_client_id,
-        client_secret=settings.google_client_secret,
-        server_metadata_url="https://accounts.google.com/.well-known/openid-configuration",
-        client_kwargs={"scope": "openid email profile"},
-    )
     redirect_uri = str(request.url_for("google_callback"))
-    return await oauth.google.authorize_redirect(request, redirect_uri)
+    return await _get_oauth().google.authorize_redirect(request, redirect_uri)
 
 
 @router.get("/callback")
 async def google_callback(request: Request, db: AsyncSession = Depends(get_db)):
     _require_auth()
-    from authlib.integrations.starlette_client import OAuth
-
-    oauth = OAuth()
-    oauth.register(
-        name="google",
-        client_id=settings.google_client_id,
-        client_secret=settings.google_client_secret,
-        server_metadata_url="https://accounts.google.com/.well-known/openid-configuration",
-        client_kwargs={"scope": "openid email profile"},
-    )
-
-    token = await oauth.google.authorize_access_token(request)
+    token = await _get_oauth().google.authorize_access_token(request)
     userinfo = token.get("userinfo", {})
 
     email = userinfo.get("email")
@@ -62,16 +67,17 @@ async def google_callback(request: Request, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(User).where(User.email == email))
     user = result.scalar_one_or_none()
     if user is None:
+        # id is generated client-side, so there's nothing to refresh after commit
         user = User(
+            id=new_id(),
             email=email,
             name=userinfo.get("name", ""),
             google_id=userinfo.get("sub"),
         )
         db.add(user)
-        await db.commit()
-        await db.refresh(user)
     elif not user.google_id:
         user.google_id = userinfo.get("sub")
+    if db.new or db.dirty:
         await db.commit()
 
     jwt_token = create_jwt(user.id, user.email)
@@ -81,7 +87,7 @@ async def google_callback(request: Request, db: AsyncSession = Depends(get_db)):
         jwt_token,
         httponly=True,
         samesite="lax",
-        max_age=settings.jwt_expire_hours * 3600,
+        max_age=_JWT_COOKIE_MAX_AGE,
     )
     return response
 
@@ -3,24 +3,48 @@
 from __future__ import annotations
 
 import os
+import time
 
 from fastapi import APIRouter
 
 import modules.globals
+from modules.face_analyser import get_face_analyser
+from modules.processors.frame.face_swapper import get_face_swapper
 
 router = APIRouter(tags=["health"])
 
+_models_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "models")
+_SWAPPER_MODEL = os.path.join(_models_dir, "inswapper_128.onnx")
+_ENHANCER_MODEL = os.path.join(_models_dir, "GFPGANv1.4.pth")
+
+# Model files can be downloaded while the server runs, so the existence
+# check is cached briefly rather than forever.
+_FILES_TTL = 30.0
+_files_checked_at = float("-inf")
+_files_exist: tuple[bool, bool] = (False, False)
+
+_models_loaded = False  # set once both models are up; they're never unloaded
+
+
+def _model_files_exist() -> tuple[bool, bool]:
+    global _files_checked_at, _files_exist
+    now = time.monotonic()
+    if now - _files_checked_at >= _FILES_TTL:
+        _files_exist = (os.path.exists(_SWAPPER_MODEL), os.path.exists(_ENHANCER_MODEL))
+        _files_checked_at = now
+    return _files_exist
+
 
 @router.get("/health")
 async def health():
-    from modules.face_analyser import get_face_analyser
-    from modules.processors.frame.face_swapper import get_face_swapper
-
-    swapper_loaded = get_face_swapper() is not None
-    analyser_loaded = get_face_analyser() is not None
-    models_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "models")
-    swapper_model = os.path.join(models_dir, "inswapper_128.onnx")
-    enhancer_model = os.path.join(models_dir, "GFPGANv1.4.pth")
+    global _models_loaded
+    if _models_loaded:
+        swapper_loaded = analyser_loaded = True
+    else:
+        swapper_loaded = get_face_swapper() is not None
+        analyser_loaded = get_face_analyser() is not None
+        _models_loaded = swapper_loaded and analyser_loaded
+    swapper_exists, enhancer_exists = _model_files_exist()
 
     return {
         "status": "ok" if (swapper_loaded and analyser_loaded) else "degraded",
@@ -29,10 +53,10 @@ async def health():
             "face_analyser": {"loaded": analyser_loaded},
             "face_swapper": {
                 "loaded": swapper_loaded,
-                "model_exists": os.path.exists(swapper_model),
+                "model_exists": swapper_exists,
             },
             "face_enhancer": {
-                "model_exists": os.path.exists(enhancer_model),
+                "model_exists": enhancer_exists,
             },
         },
     }
@@ -16,6 +16,13 @@ from api.storage import result_path
 
 router = APIRouter(tags=["jobs"])
 
+_MEDIA_TYPES = {
+    ".mp4": "video/mp4",
+    ".webm": "video/webm",
+    ".jpg": "image/jpeg",
+    ".png": "image/png",
+}
+
 
 @router.get("/job/{job_id}")
 async def job_status(job_id: str, db: AsyncSession = Depends(get_db)):
@@ -69,7 +76,7 @@ async def job_download(job_id: str, db: AsyncSession = Depends(get_db)):
 
     # Determine media type from extension
     ext = os.path.splitext(path)[1].lower()
-    media_type = "video/mp4" if ext == ".mp4" else "image/jpeg"
+    media_type = _MEDIA_TYPES.get(ext, "application/octet-stream")
     filename = f"result{ext}"
 
     return FileResponse(
@@ -2,9 +2,11 @@
 
 from __future__ import annotations
 
+import functools
+
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import RedirectResponse
-from sqlalchemy import select
+from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.auth import get_current_user
@@ -15,18 +17,22 @@ from api.models import User
 router = APIRouter(tags=["payments"])
 
 
-def _stripe_configured() -> bool:
-    return bool(settings.stripe_secret_key and settings.stripe_price_id)
+_STRIPE_CONFIGURED = bool(settings.stripe_secret_key and settings.stripe_price_id)
 
 
-def _get_stripe():
-    if not _stripe_configured():
-        raise HTTPException(status_code=404, detail="Payments not configured")
+@functools.lru_cache(maxsize=1)
+def _stripe_module():
     import stripe
     stripe.api_key = settings.stripe_secret_key
     return stripe
 
 
+def _get_stripe():
+    if not _STRIPE_CONFIGURED:
+        raise HTTPException(status_code=404, detail="Payments not configured")
+    return _stripe_module()
+
+
 @router.get("/checkout")
 async def checkout(
     request: Request,
@@ -43,13 +49,14 @@ async def checkout(
         user.stripe_customer_id = customer.id
         await db.commit()
 
-    base_url = str(request.base_url).rstrip("/")
+    # url_for honours the proxy root_path, unlike hand-built base_url strings
+    home = request.url_for("root")
     session = stripe.checkout.Session.create(
         customer=user.stripe_customer_id,
         mode="subscription",
         line_items=[{"price": settings.stripe_price_id, "quantity": 1}],
-        success_url=f"{base_url}/?upgraded=1",
-        cancel_url=f"{base_url}/",
+        success_url=str(home.include_query_params(upgraded=1)),
+        cancel_url=str(home),
     )
     return RedirectResponse(session.url, status_code=303)
 
@@ -72,33 +79,30 @@ async def stripe_webhook(request: Request, db: AsyncSession = Depends(get_db)):
         customer_id = session.get("customer")
         subscription_id = session.get("subscription")
         if customer_id:
-            result = await db.execute(
-                select(User).where(User.stripe_customer_id == customer_id)
+            await db.execute(
+                update(User)
+                .where(User.stripe_customer_id == customer_id)
+                .values(tier="premium", stripe_subscription_id=subscription_id)
             )
-            user = result.scalar_one_or_none()
-            if user:
-                user.tier = "premium"
-                user.stripe_subscription_id = subscription_id
-                await db.commit()
+            await db.commit()
 
     elif event["type"] in ("customer.subscription.deleted", "invoice.payment_failed"):
         obj = event["data"]["object"]
         customer_id = obj.get("customer")
         if customer_id:
-            result = await db.execute(
-                select(User).where(User.stripe_customer_id == customer_id)
+            await db.execute(
+                update(User)
+                .where(User.stripe_customer_id == customer_id)
+                .values(tier="free", stripe_subscription_id=None)
             )
-            user = result.scalar_one_or_none()
-            if user:
-                user.tier = "free"
-                user.stripe_subscription_id = None
-                await db.commit()
+            await db.commit()
 
     return {"status": "ok"}
 
 
 @router.get("/billing")
 async def billing(
+    request: Request,
     user: User | None = Depends(get_current_user),
 ):
     if user is None:
@@ -108,6 +112,6 @@ async def billing(
     stripe = _get_stripe()
     session = stripe.billing_portal.Session.create(
         customer=user.stripe_customer_id,
-        return_url="/",
+        return_url=str(request.url_for("root")),
     )
     return RedirectResponse(session.url, status_code=303)
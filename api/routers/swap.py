@@ -2,29 +2,39 @@
 
 from __future__ import annotations
 
-import io
 import os
 import tempfile
-import uuid
 
 import cv2
 import numpy as np
 from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
 from api.auth import get_current_user
 from api.config import settings
 from api.database import get_db
-from api.models import Job, UsageRecord, User
+from api.models import Job, UsageRecord, User, new_id
 from api.queue import job_queue
 from api.storage import result_path, save_result
-from api.tier import check_usage_limit, get_max_video_bytes
+from api.tier import check_usage_limit, get_max_video_bytes, increment_usage, record_usage
+from modules.uploads import UPLOAD_CHUNK_BYTES, save_upload
 
 router = APIRouter(tags=["swap"])
 
 
-def _decode_image(data: bytes, label: str) -> np.ndarray:
+async def _read_limited(upload: UploadFile, limit: int, detail: str) -> bytearray:
+    """Read an upload in chunks, failing as soon as it exceeds *limit* bytes."""
+    data = bytearray()
+    while chunk := await upload.read(UPLOAD_CHUNK_BYTES):
+        data += chunk
+        if len(data) > limit:
+            raise HTTPException(status_code=400, detail=detail)
+    return data
+
+
+def _decode_image(data: bytes | bytearray, label: str) -> np.ndarray:
     arr = np.frombuffer(data, dtype=np.uint8)
     img = cv2.imdecode(arr, cv2.IMREAD_COLOR)
     if img is None:
@@ -44,18 +54,17 @@ async def swap(
 ):
     await check_usage_limit(request, user, "image", db)
 
-    source_bytes = await source.read()
-    if len(source_bytes) > settings.max_image_bytes:
-        raise HTTPException(status_code=400, detail="Source file exceeds size limit")
-
-    target_bytes = await target.read()
-    if len(target_bytes) > settings.max_image_bytes:
-        raise HTTPException(status_code=400, detail="Target file exceeds size limit")
-
     # Premium-only enhancement
     if enhance and (user is None or user.tier != "premium"):
         raise HTTPException(status_code=403, detail="Face enhancement requires a premium subscription")
 
+    source_bytes = await _read_limited(
+        source, settings.max_image_bytes, "Source file exceeds size limit"
+    )
+    target_bytes = await _read_limited(
+        target, settings.max_image_bytes, "Target file exceeds size limit"
+    )
+
     source_img = _decode_image(source_bytes, "source")
     target_img = _decode_image(target_bytes, "target")
 
@@ -95,8 +104,9 @@ async def swap(
         raise HTTPException(status_code=500, detail="Failed to encode result image")
 
     # Record usage + persist job
-    job_id = uuid.uuid4().hex
-    result_file = save_result(job_id, buf.tobytes(), ".jpg")
+    job_id = new_id()
+    data = buf.tobytes()
+    result_file = await run_in_threadpool(save_result, job_id, data, ".jpg")
 
     job = Job(
         id=job_id, user_id=user.id if user else None,
@@ -112,9 +122,11 @@ async def swap(
     )
     db.add(job)
     db.add(usage)
+    used = await record_usage(request, user, "image", db)
     await db.commit()
+    increment_usage(request, user, "image", used)
 
-    return StreamingResponse(io.BytesIO(buf.tobytes()), media_type="image/jpeg")
+    return Response(content=data, media_type="image/jpeg")
 
 
 @router.post("/swap/video")
@@ -129,19 +141,12 @@ async def swap_video(
 ):
     await check_usage_limit(request, user, "video", db)
 
-    source_bytes = await source.read()
-    if len(source_bytes) > settings.max_image_bytes:
-        raise HTTPException(status_code=400, detail="Source file exceeds size limit")
-
-    max_video = get_max_video_bytes(user)
-    target_bytes = await target.read()
-    if len(target_bytes) > max_video:
-        mb = max_video // (1024 * 1024)
-        raise HTTPException(status_code=400, detail=f"Target video exceeds {mb} MB limit")
-
     if enhance and (user is None or user.tier != "premium"):
         raise HTTPException(status_code=403, detail="Face enhancement requires a premium subscription")
 
+    source_bytes = await _read_limited(
+        source, settings.max_image_bytes, "Source file exceeds size limit"
+    )
     source_img = _decode_image(source_bytes, "source")
 
     from modules.face_analyser import get_one_face
@@ -149,12 +154,17 @@ async def swap_video(
     if source_face is None:
         raise HTTPException(status_code=400, detail="No face detected in source image")
 
+    # Stream the target straight to disk; the whole video never sits in memory
+    max_video = get_max_video_bytes(user)
     suffix = os.path.splitext(target.filename or "video.mp4")[1] or ".mp4"
-    tmp_in = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
-    tmp_in.write(target_bytes)
-    tmp_in.close()
+    fd, tmp_in = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    await save_upload(
+        target, tmp_in, max_video,
+        f"Target video exceeds {max_video // (1024 * 1024)} MB limit",
+    )
 
-    job_id = uuid.uuid4().hex
+    job_id = new_id()
     priority = 0 if user and user.tier == "premium" else 1
 
     job = Job(
@@ -169,11 +179,13 @@ async def swap_video(
     )
     db.add(job)
     db.add(usage)
+    used = await record_usage(request, user, "video", db)
     await db.commit()
+    increment_usage(request, user, "video", used)
 
     job_queue.enqueue(job_id, priority, {
         "source_face": source_face,
-        "tmp_in": tmp_in.name,
+        "tmp_in": tmp_in,
         "many_faces": many_faces,
         "enhance": enhance,
     })
@@ -2,31 +2,61 @@
 
 from __future__ import annotations
 
+import hashlib
 from datetime import datetime, timedelta, timezone
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func, select
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import Text, cast, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.auth import get_current_user
 from api.config import settings
 from api.database import get_db
 from api.models import Job, UsageRecord, User
+from api.tier import today_start_utc
 
 router = APIRouter(prefix="/me", tags=["user"])
 
+# Per-user data tied to the session cookie: shared caches must not store it,
+# and browsers revalidate every time (cheap via the ETag) so a logout, account
+# switch or upgrade shows up immediately
+_CACHE_CONTROL = "private, no-cache"
+
+
+def _etag(*parts: object) -> str:
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=8).hexdigest()
+    return f'"{digest}"'
+
+
+def _cache_headers(etag: str) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": _CACHE_CONTROL}
+
+
+def _not_modified(request: Request, etag: str) -> Response | None:
+    """Return a 304 if the client already has this version."""
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=_cache_headers(etag))
+    return None
+
 
 @router.get("")
-async def me(user: User | None = Depends(get_current_user)):
+async def me(
+    request: Request,
+    user: User | None = Depends(get_current_user),
+):
     if user is None:
         raise HTTPException(status_code=401, detail="Not logged in")
-    return {
+    body = {
         "id": user.id,
         "email": user.email,
         "name": user.name,
         "tier": user.tier,
         "created_at": user.created_at.isoformat() if user.created_at else None,
     }
+    etag = _etag(body)
+    return _not_modified(request, etag) or ORJSONResponse(body, headers=_cache_headers(etag))
 
 
 @router.get("/usage")
@@ -37,27 +67,21 @@ async def usage(
     if user is None:
         raise HTTPException(status_code=401, detail="Not logged in")
 
-    today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    today_start = today_start_utc()
 
-    image_count = (
-        await db.execute(
-            select(func.count(UsageRecord.id)).where(
-                UsageRecord.user_id == user.id,
-                UsageRecord.job_type == "image",
-                UsageRecord.created_at >= today_start,
-            )
-        )
-    ).scalar_one()
-
-    video_count = (
-        await db.execute(
-            select(func.count(UsageRecord.id)).where(
-                UsageRecord.user_id == user.id,
-                UsageRecord.job_type == "video",
-                UsageRecord.created_at >= today_start,
-            )
+    # One grouped query for both counts instead of a round trip per type
+    result = await db.execute(
+        select(UsageRecord.job_type, func.count(UsageRecord.id))
+        .where(
+            UsageRecord.user_id == user.id,
+            UsageRecord.job_type.in_(("image", "video")),
+            UsageRecord.created_at >= today_start,
         )
-    ).scalar_one()
+        .group_by(UsageRecord.job_type)
+    )
+    counts = dict(result.all())
+    image_count = counts.get("image", 0)
+    video_count = counts.get("video", 0)
 
     if user.tier == "premium":
         img_limit, vid_limit = -1, -1
@@ -78,6 +102,7 @@ async def usage(
 
 @router.get("/history")
 async def history(
+    request: Request,
     user: User | None = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
@@ -87,22 +112,47 @@ async def history(
     # History retention: premium=30d, free=7d
     days = 30 if user.tier == "premium" else 7
     cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    window = (Job.user_id == user.id, Job.created_at >= cutoff)
 
+    # The list changes when a job is added, ages out of the window or changes
+    # status (queued -> processing -> done/failed), so per-status counts plus
+    # the oldest and newest timestamps identify it without fetching the rows
+    per_status = (
+        await db.execute(
+            select(Job.status, func.count(Job.id), func.min(Job.created_at), func.max(Job.created_at))
+            .where(*window)
+            .group_by(Job.status)
+            .order_by(Job.status)
+        )
+    ).all()
+    etag = _etag(user.id, [tuple(row) for row in per_status])
+    not_modified = _not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+
+    # Plain column rows: no ORM instances or identity-map bookkeeping.
+    # options is CAST to text in SQL, so every backend returns the stored JSON
+    # text rather than a decoded dict; it is spliced into the response as-is
+    # instead of parsed and re-dumped.
     result = await db.execute(
-        select(Job)
-        .where(Job.user_id == user.id, Job.created_at >= cutoff)
+        select(Job.id, Job.job_type, Job.status, Job.created_at, cast(Job.options, Text))
+        .where(*window)
         .order_by(Job.created_at.desc())
         .limit(100)
     )
-    jobs = result.scalars().all()
-
-    return [
-        {
-            "id": j.id,
-            "job_type": j.job_type,
-            "status": j.status,
-            "created_at": j.created_at.isoformat() if j.created_at else None,
-            "options": j.options,
-        }
-        for j in jobs
-    ]
+
+    # Rendered straight to bytes by orjson, skipping FastAPI's
+    # jsonable_encoder pass; orjson also writes the datetimes as ISO 8601
+    return ORJSONResponse(
+        [
+            {
+                "id": job_id,
+                "job_type": job_type,
+                "status": status,
+                "created_at": created_at,
+                "options": None if options is None else orjson.Fragment(options),
+            }
+            for job_id, job_type, status, created_at, options in result.all()
+        ],
+        headers=_cache_headers(etag),
+    )
@@ -2,36 +2,150 @@
 
 from __future__ import annotations
 
+import bisect
 import os
+import threading
 import time
-from pathlib import Path
+from collections.abc import Sequence
 
 from api.config import settings
 
+# Append-only log of "<unix time> <file name>" lines, oldest first, kept in the
+# storage directory. Cleanup bisects it for the TTL cutoff and touches only the
+# expired entries instead of stat-ing every result file. The first sweep in
+# each process rebuilds it from a directory scan, which picks up files the log
+# never saw: results from before it existed, or leftovers from a crash.
+EXPIRY_LOG = ".expiry.log"
+_expiry_lock = threading.Lock()
+_log_rebuilt = False
+
+# Directories already created by this process; saves skip the mkdir after that
+_ensured_dirs: set[str] = set()
+
 
 def result_path(job_id: str, ext: str = ".jpg") -> str:
     """Return the full path for a job result file."""
     return os.path.join(settings.storage_path, f"{job_id}{ext}")
 
 
-def save_result(job_id: str, data: bytes, ext: str = ".jpg") -> str:
-    """Write result bytes to disk, return the path."""
+if hasattr(os, "writev"):
+    _writev = os.writev
+else:
+    # os.writev is Unix-only; elsewhere write the segments one at a time
+
+    def _writev(fd: int, parts: list[memoryview]) -> int:
+        return os.write(fd, parts[0])
+
+
+def _write_all(fd: int, parts: list[memoryview]) -> None:
+    """writev *parts* to *fd*, resubmitting whatever a short write left over."""
+    while parts:
+        written = _writev(fd, parts)
+        while parts and written >= len(parts[0]):
+            written -= len(parts.pop(0))
+        if written:
+            parts[0] = parts[0][written:]
+
+
+def save_result(job_id: str, data: bytes | Sequence[bytes], ext: str = ".jpg") -> str:
+    """Write result bytes to disk, return the path.
+
+    *data* may be a single buffer or a sequence of segments (e.g. header and
+    body); segments go out in one writev instead of being joined first.
+    """
     path = result_path(job_id, ext)
-    Path(os.path.dirname(path)).mkdir(parents=True, exist_ok=True)
-    with open(path, "wb") as f:
-        f.write(data)
+    directory = os.path.dirname(path)
+    if directory not in _ensured_dirs:
+        os.makedirs(directory, exist_ok=True)
+        _ensured_dirs.add(directory)
+    segments = [data] if isinstance(data, (bytes, bytearray, memoryview)) else data
+    # Raw fd rather than a buffered file object: no intermediate copy
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        _write_all(fd, [memoryview(seg).cast("B") for seg in segments])
+    finally:
+        os.close(fd)
+    track_result(path)
     return path
 
 
+def track_result(path: str) -> None:
+    """Record a finished result file in the expiry log."""
+    log_path = os.path.join(os.path.dirname(path), EXPIRY_LOG)
+    with _expiry_lock:
+        # Timestamp taken under the lock so the log stays in order
+        line = f"{time.time():.3f} {os.path.basename(path)}\n"
+        with open(log_path, "a") as f:
+            f.write(line)
+
+
+def _scan_expiry_log(storage: str) -> list[str]:
+    """Build log lines for every result file on disk, oldest first."""
+    # scandir answers is_file() from the directory entry on most filesystems,
+    # leaving one stat per result file instead of two
+    with os.scandir(storage) as it:
+        entries = [
+            (e.stat(follow_symlinks=False).st_mtime, e.name)
+            for e in it
+            if e.is_file(follow_symlinks=False) and not e.name.startswith(EXPIRY_LOG)
+        ]
+    return [f"{mtime:.3f} {name}\n" for mtime, name in sorted(entries)]
+
+
+def _stamp(line: str) -> float:
+    return float(line.split(" ", 1)[0])
+
+
 def cleanup_old_results() -> int:
     """Delete result files older than configured TTL. Returns count of deleted files."""
-    storage = Path(settings.storage_path)
-    if not storage.exists():
+    storage = settings.storage_path
+    if not os.path.isdir(storage):
         return 0
     cutoff = time.time() - (settings.result_ttl_hours * 3600)
-    deleted = 0
-    for f in storage.iterdir():
-        if f.is_file() and f.stat().st_mtime < cutoff:
-            f.unlink(missing_ok=True)
+    log_path = os.path.join(storage, EXPIRY_LOG)
+    global _log_rebuilt
+    with _expiry_lock:
+        rebuild = not _log_rebuilt
+        if rebuild:
+            lines = _scan_expiry_log(storage)
+        else:
+            try:
+                with open(log_path) as f:
+                    lines = f.readlines()
+            except FileNotFoundError:
+                lines = []
+        split = bisect.bisect_left(lines, cutoff, key=_stamp)
+        expired = lines[:split]
+        if expired or rebuild:
+            tmp_path = f"{log_path}.tmp"
+            with open(tmp_path, "w") as f:
+                f.writelines(lines[split:])
+            os.replace(tmp_path, log_path)
+        _log_rebuilt = True
+    if not expired:
+        return 0
+    return _unlink_all(storage, [line.rstrip("\n").split(" ", 1)[1] for line in expired])
+
+
+def _unlink_all(directory: str, names: list[str]) -> int:
+    """Unlink *names* inside *directory*; returns how many existed."""
+    # unlinkat against one open directory fd resolves only the final name
+    # per file, rather than walking the whole storage path every time
+    dir_fd = None
+    if os.unlink in os.supports_dir_fd:
+        dir_fd = os.open(directory, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+    try:
+        deleted = 0
+        for name in names:
+            try:
+                if dir_fd is None:
+                    os.unlink(os.path.join(directory, name))
+                else:
+                    os.unlink(name, dir_fd=dir_fd)
+            except FileNotFoundError:
+                continue
             deleted += 1
-    return deleted
+        return deleted
+    finally:
+        if dir_fd is not None:
+            os.close(dir_fd)
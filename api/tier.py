@@ -2,14 +2,18 @@
 
 from __future__ import annotations
 
-from datetime import datetime, timezone
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
 
 from fastapi import HTTPException, Request
-from sqlalchemy import func, select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Select, bindparam, func, literal, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
 
 from api.config import settings
-from api.models import UsageRecord, User
+from api.models import DailyUsage, UsageRecord, User
 
 
 def get_max_video_bytes(user: User | None) -> int:
@@ -21,6 +25,227 @@ def get_max_video_bytes(user: User | None) -> int:
     return settings.max_video_bytes_logged_in
 
 
+# Today's usage counts by (owner key, job_type), filled from the DB on first
+# check and bumped by increment_usage() after each recorded swap. Counts are
+# per process: with several workers each sees only its own increments, so
+# the DB stays the source of truth on a miss. Bounded LRU: every anonymous
+# session adds keys, and an evicted count is simply re-read from the DB.
+USAGE_CACHE_SIZE = 10_000
+_usage_counts: OrderedDict[tuple[str, str], int] = OrderedDict()
+_usage_day: datetime | None = None
+_usage_day_end = float("-inf")  # epoch seconds at which _usage_day rolls over
+
+
+def _cached_count(key: tuple[str, str]) -> int | None:
+    count = _usage_counts.get(key)
+    if count is not None:
+        _usage_counts.move_to_end(key)
+    return count
+
+
+def _cache_count(key: tuple[str, str], count: int) -> None:
+    _usage_counts[key] = count
+    _usage_counts.move_to_end(key)
+    if len(_usage_counts) > USAGE_CACHE_SIZE:
+        _usage_counts.popitem(last=False)
+
+
+def _usage_owner(request: Request, user: User | None) -> str | None:
+    if user:
+        return f"user:{user.id}"
+    session_id = request.cookies.get("dlc_session")
+    return f"session:{session_id}" if session_id else None
+
+
+def today_start_utc() -> datetime:
+    """Start of the current UTC day; resets the usage cache when it changes.
+
+    Cached until midnight, so most calls are a single float comparison.
+    """
+    global _usage_day, _usage_day_end
+    if time.time() < _usage_day_end:
+        return _usage_day
+    _usage_day = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    _usage_day_end = (_usage_day + timedelta(days=1)).timestamp()
+    _usage_counts.clear()
+    return _usage_day
+
+
+# Built once at import with bind parameters, so the hot path only binds values
+# and hits SQLAlchemy's compiled cache. Queries run as Core on the session's
+# connection: one scalar back, no ORM execution or per-row wrappers.
+# (Not named after the columns: UPDATE reserves those names for SET values)
+_DAILY_KEY = (
+    DailyUsage.owner == bindparam("key_owner"),
+    DailyUsage.usage_date == bindparam("key_date"),
+    DailyUsage.job_type == bindparam("key_job_type"),
+)
+_Q_DAILY = select(DailyUsage.count).where(*_DAILY_KEY)
+_Q_BUMP_DAILY = (
+    update(DailyUsage)
+    .where(*_DAILY_KEY)
+    .values(count=DailyUsage.count + 1)
+    .returning(DailyUsage.count)
+)
+
+
+def _records_today(*where) -> Select:
+    return select(literal(1)).where(
+        *where,
+        UsageRecord.job_type == bindparam("job_type"),
+        UsageRecord.created_at >= bindparam("since"),
+    )
+
+
+def _count_of(rows: Select) -> Select:
+    return select(func.count()).select_from(rows.subquery())
+
+
+_USER_RECORDS = _records_today(UsageRecord.user_id == bindparam("user_id"))
+_ANON_RECORDS = _records_today(
+    UsageRecord.session_id == bindparam("session_id"),
+    UsageRecord.user_id.is_(None),
+)
+# Only "count >= limit" matters for limit checks, so the probes fetch at most
+# `limit` rows and let the index scan stop there instead of counting the
+# whole day. The cached value is then capped at the limit, which compares
+# the same.
+_Q_USER_PROBE = _count_of(_USER_RECORDS.limit(bindparam("limit")))
+_Q_ANON_PROBE = _count_of(_ANON_RECORDS.limit(bindparam("limit")))
+_Q_USER_COUNT = _count_of(_USER_RECORDS)
+_Q_ANON_COUNT = _count_of(_ANON_RECORDS)
+
+
+async def _count_records(
+    conn: AsyncConnection,
+    request: Request,
+    user: User | None,
+    job_type: str,
+    since: datetime,
+    limit: int | None = None,
+) -> int:
+    """Count today's usage_records for the request's owner, capped at *limit* if given."""
+    params = {"job_type": job_type, "since": since}
+    if limit is not None:
+        params["limit"] = limit
+    if user:
+        stmt = _Q_USER_COUNT if limit is None else _Q_USER_PROBE
+        params["user_id"] = user.id
+    else:
+        # Track anonymous users by session cookie
+        stmt = _Q_ANON_COUNT if limit is None else _Q_ANON_PROBE
+        params["session_id"] = request.cookies.get("dlc_session")
+    return (await conn.execute(stmt, params)).scalar_one()
+
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE; others read-modify-write
+_UPSERT_INSERT = {"sqlite": sqlite_insert, "postgresql": pg_insert}
+
+
+async def record_usage(
+    request: Request,
+    user: User | None,
+    job_type: str,
+    db: AsyncSession,
+) -> int | None:
+    """Bump today's DailyUsage row in the caller's transaction (not committed).
+
+    Call after adding this request's UsageRecord. Returns the new count, read
+    back in the same statement as the write, or None if the request has no
+    owner to count against. Pass it to increment_usage after committing to
+    refresh the cache without a separate count query.
+    """
+    owner = _usage_owner(request, user)
+    if owner is None:
+        return None
+    today_start = today_start_utc()
+    today = today_start.date()
+    insert = _UPSERT_INSERT.get(db.bind.dialect.name)
+    if insert is None:
+        row = await db.get(DailyUsage, (owner, today, job_type))
+        if row is not None:
+            row.count += 1
+            return row.count
+        seed = await _seed_count(request, user, job_type, today_start, db)
+        db.add(DailyUsage(owner=owner, usage_date=today, job_type=job_type, count=seed))
+        return seed
+
+    conn = await db.connection()
+    key = {"key_owner": owner, "key_date": today, "key_job_type": job_type}
+    count = (await conn.execute(_Q_BUMP_DAILY, key)).scalar()
+    if count is not None:
+        return count
+    # First use today (in this counter): start from what usage_records holds
+    seed = await _seed_count(request, user, job_type, today_start, db)
+    stmt = insert(DailyUsage).values(owner=owner, usage_date=today, job_type=job_type, count=seed)
+    # Another request may have created the row since the UPDATE missed
+    result = await conn.execute(stmt.on_conflict_do_update(
+        index_elements=[DailyUsage.owner, DailyUsage.usage_date, DailyUsage.job_type],
+        set_={"count": DailyUsage.count + 1},
+    ).returning(DailyUsage.count))
+    return result.scalar_one()
+
+
+def increment_usage(
+    request: Request, user: User | None, job_type: str, count: int | None = None
+) -> None:
+    """Count a committed UsageRecord against today's cached total.
+
+    *count* is the post-insert total from record_usage; it also picks up
+    usage recorded by other workers since the cache was filled.
+    """
+    owner = _usage_owner(request, user)
+    if owner is None:
+        return
+    today_start_utc()
+    key = (owner, job_type)
+    known = _cached_count(key)
+    if known is not None:
+        _cache_count(key, known + 1 if count is None else max(known + 1, count))
+    elif count is not None:
+        _cache_count(key, count)
+
+
+async def _seed_count(
+    request: Request,
+    user: User | None,
+    job_type: str,
+    today_start: datetime,
+    db: AsyncSession,
+) -> int:
+    """Starting value for a new DailyUsage row: every usage record so far today.
+
+    Records made before the counter existed (e.g. earlier on deploy day)
+    count too; the caller's own record is flushed first so it is included.
+    """
+    await db.flush()
+    conn = await db.connection()
+    return max(await _count_records(conn, request, user, job_type, today_start), 1)
+
+
+async def _count_today(
+    request: Request,
+    user: User | None,
+    owner: str,
+    job_type: str,
+    limit: int,
+    db: AsyncSession,
+) -> int:
+    """Today's usage for *owner*, from its DailyUsage row if there is one."""
+    today_start = today_start_utc()
+    conn = await db.connection()
+    count = (await conn.execute(
+        _Q_DAILY,
+        {"key_owner": owner, "key_date": today_start.date(), "key_job_type": job_type},
+    )).scalar()
+    if count is not None:
+        return count
+
+    # No counter row: nothing recorded today, or only records from before the
+    # counter existed, so fall back to usage_records
+    return await _count_records(conn, request, user, job_type, today_start, limit)
+
+
 async def check_usage_limit(
     request: Request,
     user: User | None,
@@ -28,13 +253,13 @@ async def check_usage_limit(
     db: AsyncSession,
 ) -> None:
     """Raise 429 if the user/session has exceeded their daily limit."""
-    today_start = datetime.now(timezone.utc).replace(
-        hour=0, minute=0, second=0, microsecond=0
-    )
-
     if user and user.tier == "premium":
         return  # unlimited
 
+    owner = _usage_owner(request, user)
+    if owner is None:
+        return  # no session → can't track, allow (session set on response)
+
     # Determine limit
     if user:
         limit = (
@@ -42,31 +267,23 @@ async def check_usage_limit(
             if job_type == "image"
             else settings.free_video_swaps_per_day
         )
-        count_query = select(func.count(UsageRecord.id)).where(
-            UsageRecord.user_id == user.id,
-            UsageRecord.job_type == job_type,
-            UsageRecord.created_at >= today_start,
-        )
     else:
         limit = (
             settings.anon_image_swaps_per_day
             if job_type == "image"
             else settings.anon_video_swaps_per_day
         )
-        # Track anonymous users by session cookie
-        session_id = request.cookies.get("dlc_session")
-        if not session_id:
-            return  # no session → can't track, allow (session set on response)
-        count_query = select(func.count(UsageRecord.id)).where(
-            UsageRecord.session_id == session_id,
-            UsageRecord.user_id.is_(None),
-            UsageRecord.job_type == job_type,
-            UsageRecord.created_at >= today_start,
-        )
 
-    count = (await db.execute(count_query)).scalar_one()
+    if limit == -1:
+        return  # unlimited for this tier
+
+    key = (owner, job_type)
+    count = _cached_count(key)
+    if count is None:
+        count = await _count_today(request, user, owner, job_type, limit, db)
+        _cache_count(key, count)
 
-    if limit != -1 and count >= limit:
+    if count >= limit:
         raise HTTPException(
             status_code=429,
             detail=f"Daily {job_type} swap limit reached ({limit}). Upgrade for unlimited access.",
@@ -1,75 +1,151 @@
+import asyncio
+import gzip
+import hashlib
 import io
 import os
-import platform
-import sys
+import queue
 import tempfile
 import threading
 import time
-import types
 import uuid
-from contextlib import asynccontextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, field
 
 import cv2
 import numpy as np
-from fastapi import FastAPI, File, HTTPException, Query, UploadFile
+import orjson
+from fastapi import FastAPI, File, HTTPException, Query, Request, Response, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, StreamingResponse
+from fastapi.responses import FileResponse, HTMLResponse, ORJSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 
-# Stub modules.core so face_swapper/face_enhancer don't pull in tensorflow
-if "modules.core" not in sys.modules:
-    _core_stub = types.ModuleType("modules.core")
+# Stubs modules.core so face_swapper/face_enhancer don't pull in tensorflow
+from modules.headless import warm_models
 
-    def _update_status(message: str, scope: str = "DLC.API") -> None:
-        print(f"[{scope}] {message}")
+import modules.globals  # noqa: E402
+from modules.face_analyser import (  # noqa: E402
+    detector_supports_batch,
+    get_many_faces,
+    get_many_faces_batch,
+    get_one_face,
+)
+from modules.processors.frame.face_swapper import swap_face  # noqa: E402
+from modules.uploads import save_upload  # noqa: E402
+from modules.video_io import open_reader, open_writer, pick_encoder  # noqa: E402
 
-    _core_stub.update_status = _update_status  # type: ignore[attr-defined]
-    sys.modules["modules.core"] = _core_stub
+# Optional: libjpeg-turbo's SIMD encoder is much faster than OpenCV's for /swap
+try:
+    from turbojpeg import TJPF_BGR, TurboJPEG
 
-import modules.globals  # noqa: E402
-from modules.face_analyser import get_face_analyser, get_many_faces, get_one_face  # noqa: E402
-from modules.processors.frame.face_swapper import get_face_swapper, swap_face  # noqa: E402
+    _TURBOJPEG = TurboJPEG()
+except Exception:
+    _TURBOJPEG = None
 
 MAX_UPLOAD_BYTES = 10 * 1024 * 1024  # 10 MB per image
 MAX_VIDEO_BYTES = 100 * 1024 * 1024  # 100 MB per video
+JPEG_QUALITY = 95  # matches OpenCV's default so both encoders agree
 
 # --- Job store for async video processing ---
-jobs: dict[str, dict] = {}
-JOBS_LOCK = threading.Lock()
+@dataclass
+class Job:
+    """In-memory state of one video job.
+
+    Frame counters are written only by the job's worker thread and read
+    without locking (attribute stores are atomic under the GIL). Status
+    transitions go through the job's own lock, so jobs never contend with
+    each other.
+    """
+
+    tmp_in: str
+    tmp_out: str
+    status: str = "processing"
+    total_frames: int = 0
+    processed_frames: int = 0
+    error: str | None = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+    future: Future | None = field(default=None, repr=False)  # set once submitted
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def fail(self, error: str) -> None:
+        with self.lock:
+            self.status = "failed"
+            self.error = error
+
+    def finish(self) -> None:
+        with self.lock:
+            self.status = "done"
+            self.finished_at = time.time()
+
+
+jobs: dict[str, Job] = {}
+JOBS_LOCK = threading.Lock()  # guards inserting/removing/iterating jobs only
 JOB_TTL = 600  # seconds to keep completed jobs before cleanup
-
-
-def _configure_globals() -> None:
-    """Set modules.globals for headless API mode."""
-    modules.globals.headless = True
-    modules.globals.many_faces = False
-    modules.globals.map_faces = False
-    modules.globals.mouth_mask = False
-    modules.globals.poisson_blend = False
-
-    if platform.system() == "Darwin" and platform.machine() == "arm64":
-        modules.globals.execution_providers = [
-            "CoreMLExecutionProvider",
-            "CPUExecutionProvider",
-        ]
-    else:
-        modules.globals.execution_providers = ["CPUExecutionProvider"]
+VIDEO_JOBS = max(1, int(os.getenv("DLC_VIDEO_JOBS", "2")))  # jobs processed concurrently
+MAX_PENDING_JOBS = int(os.getenv("DLC_MAX_PENDING_JOBS", "16"))  # queued + running
+JOB_EVENT_INTERVAL = 0.5  # seconds between progress checks on /job/{id}/events
+# Set on shutdown; running jobs stop at their next frame instead of holding
+# up interpreter exit (pool threads are joined then) until they finish
+SHUTTING_DOWN = threading.Event()
+
+# --- Per-job frame parallelism ---
+# swap_face/enhance_face spend most of their time in native code that releases
+# the GIL, so a small pool keeps the inference session busy while decode and
+# encode run on the job thread.
+VIDEO_WORKERS = max(1, int(os.getenv("DLC_VIDEO_WORKERS", (os.cpu_count() or 2) // 2)))
+# Frames per batched face-detection call; <= 1 disables batching. Only used
+# when the detector model has a dynamic batch dimension.
+DETECT_BATCH = int(os.getenv("DLC_DETECT_BATCH", "8"))
+
+# Model handles resolved once in lifespan (None if unavailable)
+_ANALYSER = None
+_SWAPPER = None
+_ENHANCE_FN = None
+
+
+def _limit_native_threads() -> None:
+    """Right-size OpenCV/ONNX Runtime thread pools when frames run in parallel.
+
+    With several frame workers, letting each library also fan out across all
+    cores oversubscribes the CPU; must run before the models are loaded.
+    """
+    if VIDEO_WORKERS <= 1:
+        return
+    cv2.setNumThreads(1)
+    modules.globals.intra_op_threads = max(1, (os.cpu_count() or 1) // VIDEO_WORKERS)
+
+
+def _load_enhancer() -> None:
+    global _ENHANCE_FN
+    try:
+        from modules.processors.frame.face_enhancer import enhance_face
+        _ENHANCE_FN = enhance_face
+    except Exception as exc:
+        print(f"[DLC.API] Face enhancer unavailable: {exc}")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    _configure_globals()
-    get_face_analyser()
-    get_face_swapper()
+    global _ANALYSER, _SWAPPER
+    _limit_native_threads()
+    _ANALYSER, _SWAPPER = warm_models(os.getenv("DLC_INFERENCE_PRECISION"))
+    pick_encoder()
+    _load_enhancer()
+    app.state.video_pool = ThreadPoolExecutor(
+        max_workers=VIDEO_JOBS, thread_name_prefix="video-job"
+    )
     yield
-    # Cleanup temp files from any remaining jobs
+    SHUTTING_DOWN.set()
+    app.state.video_pool.shutdown(wait=False, cancel_futures=True)
+    # Cleanup temp files from any remaining jobs. A running job is still
+    # reading and writing its files; its thread removes them once it stops.
     with JOBS_LOCK:
         for job in jobs.values():
-            for path in (job.get("tmp_in"), job.get("tmp_out")):
-                if path:
-                    try:
-                        os.unlink(path)
-                    except OSError:
-                        pass
+            if job.status == "processing" and job.future is not None and not job.future.cancelled():
+                continue
+            _remove_job_files(job)
 
 
 app = FastAPI(
@@ -77,6 +153,7 @@ app = FastAPI(
     description="Face swap REST API powered by Deep-Live-Cam",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 app.add_middleware(
@@ -271,6 +348,40 @@ async function doImageSwap(params, fd) {
 }
 
 // --- Video swap (job-based with progress) ---
+function showProgress(job) {
+  const pct = job.total_frames > 0 ? Math.round((job.processed_frames / job.total_frames) * 100) : 0;
+  progressBar.style.width = pct + '%';
+  progressBar.textContent = pct + '%';
+  progressText.textContent = 'Frame ' + job.processed_frames + ' / ' + job.total_frames;
+}
+
+// Resolves with the finished job, pushed over Server-Sent Events
+function watchJobEvents(jobId) {
+  return new Promise((resolve, reject) => {
+    if (!window.EventSource) { reject(new Error('EventSource unsupported')); return; }
+    const es = new EventSource('/job/' + jobId + '/events');
+    es.onmessage = (e) => {
+      const job = JSON.parse(e.data);
+      if (job.status === 'processing') { showProgress(job); return; }
+      es.close();
+      resolve(job);
+    };
+    es.onerror = () => { es.close(); reject(new Error('Event stream failed')); };
+  });
+}
+
+// Fallback when SSE is unavailable: poll once a second
+async function pollJob(jobId) {
+  while (true) {
+    await new Promise(r => setTimeout(r, 1000));
+    const pollResp = await fetch('/job/' + jobId);
+    if (!pollResp.ok) throw new Error('Failed to check job status');
+    const job = await pollResp.json();
+    if (job.status !== 'processing') return job;
+    showProgress(job);
+  }
+}
+
 async function doVideoSwap(params, fd) {
   // 1. Submit job
   progressText.textContent = 'Uploading video...';
@@ -285,39 +396,32 @@ async function doVideoSwap(params, fd) {
   progressWrap.style.display = 'block';
   progressText.textContent = 'Processing frames...';
 
-  // 2. Poll for progress
-  while (true) {
-    await new Promise(r => setTimeout(r, 1000));
-    const pollResp = await fetch('/job/' + job_id);
-    if (!pollResp.ok) throw new Error('Failed to check job status');
-    const job = await pollResp.json();
+  // 2. Follow progress
+  let job;
+  try {
+    job = await watchJobEvents(job_id);
+  } catch (e) {
+    job = await pollJob(job_id);
+  }
 
-    if (job.status === 'processing') {
-      const pct = job.total_frames > 0 ? Math.round((job.processed_frames / job.total_frames) * 100) : 0;
-      progressBar.style.width = pct + '%';
-      progressBar.textContent = pct + '%';
-      progressText.textContent = 'Frame ' + job.processed_frames + ' / ' + job.total_frames;
-    } else if (job.status === 'done') {
-      progressBar.style.width = '100%';
-      progressBar.textContent = '100%';
-      progressText.textContent = 'Done! Downloading result...';
-      // 3. Download result
-      const dlResp = await fetch('/job/' + job_id + '/download');
-      if (!dlResp.ok) throw new Error('Failed to download result');
-      const blob = await dlResp.blob();
-      const url = URL.createObjectURL(blob);
-      const vid = document.createElement('video');
-      vid.src = url; vid.controls = true; vid.autoplay = true;
-      vid.style.maxWidth = '100%'; vid.style.borderRadius = '12px'; vid.style.border = '1px solid #222';
-      resultArea.appendChild(vid);
-      const dl = document.createElement('a');
-      dl.href = url; dl.download = 'result.mp4'; dl.className = 'download-btn'; dl.textContent = 'Download MP4';
-      resultArea.appendChild(dl);
-      break;
-    } else if (job.status === 'failed') {
-      throw new Error(job.error || 'Video processing failed');
-    }
+  if (job.status === 'failed') {
+    throw new Error(job.error || 'Video processing failed');
   }
+  progressBar.style.width = '100%';
+  progressBar.textContent = '100%';
+  progressText.textContent = 'Done! Downloading result...';
+  // 3. Download result
+  const dlResp = await fetch('/job/' + job_id + '/download');
+  if (!dlResp.ok) throw new Error('Failed to download result');
+  const blob = await dlResp.blob();
+  const url = URL.createObjectURL(blob);
+  const vid = document.createElement('video');
+  vid.src = url; vid.controls = true; vid.autoplay = true;
+  vid.style.maxWidth = '100%'; vid.style.borderRadius = '12px'; vid.style.border = '1px solid #222';
+  resultArea.appendChild(vid);
+  const dl = document.createElement('a');
+  dl.href = url; dl.download = 'result.mp4'; dl.className = 'download-btn'; dl.textContent = 'Download MP4';
+  resultArea.appendChild(dl);
 }
 
 swapBtn.addEventListener('click', async () => {
@@ -354,17 +458,92 @@ fetch('/health').then(r => r.json()).then(d => {
 </body>
 </html>"""
 
+# The page is static: encode, compress and fingerprint it once at import.
+_INDEX_BYTES = INDEX_HTML.encode()
+_INDEX_GZIP = gzip.compress(_INDEX_BYTES, 9)
+_INDEX_ETAG = '"' + hashlib.blake2s(_INDEX_BYTES).hexdigest()[:16] + '"'
+# Not "immutable": the page changes across deploys at the same URL, so
+# browsers revalidate with the ETag once the hour is up.
+_INDEX_CACHE_CONTROL = "public, max-age=3600"
+
 
 @app.get("/", response_class=HTMLResponse, include_in_schema=False)
-async def root():
-    return INDEX_HTML
+async def root(request: Request):
+    headers = {
+        "ETag": _INDEX_ETAG,
+        "Cache-Control": _INDEX_CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+    }
+    if request.headers.get("if-none-match") == _INDEX_ETAG:
+        return Response(status_code=304, headers=headers)
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(_INDEX_GZIP, media_type="text/html", headers=headers)
+    return Response(_INDEX_BYTES, media_type="text/html", headers=headers)
 
 
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
-def _decode_image(data: bytes, label: str) -> np.ndarray:
+class _BufferPool:
+    """Reusable upload buffers so each image read doesn't allocate a fresh one.
+
+    Buffers are borrowed per request rather than kept thread-local because
+    concurrent requests share the event loop thread. At most ``limit``
+    buffers are ever allocated; once all are lent out ``borrow`` yields None
+    and the caller reads the upload without one.
+    """
+
+    def __init__(self, size: int, limit: int = 4) -> None:
+        self._size = size
+        self._limit = limit
+        self._allocated = 0
+        self._free: list[bytearray] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def borrow(self):
+        with self._lock:
+            if self._free:
+                buf = self._free.pop()
+            elif self._allocated < self._limit:
+                buf = bytearray(self._size)
+                self._allocated += 1
+            else:
+                buf = None
+        try:
+            yield buf
+        finally:
+            if buf is not None:
+                with self._lock:
+                    self._free.append(buf)
+
+
+class _FramePool:
+    """Fixed set of preallocated BGR frame buffers recycled between decode and write.
+
+    ``acquire`` blocks when every buffer is in flight, which doubles as
+    backpressure on the decoder.
+    """
+
+    def __init__(self, shape: tuple[int, int, int], n: int) -> None:
+        self._free: queue.LifoQueue[np.ndarray] = queue.LifoQueue()
+        for _ in range(n):
+            self._free.put(np.empty(shape, np.uint8))
+
+    def acquire(self) -> np.ndarray:
+        return self._free.get()
+
+    def release(self, buf: np.ndarray) -> None:
+        self._free.put(buf)
+
+
+# One spare byte so an oversized upload is detectable without reading it all.
+_UPLOAD_BUFFERS = _BufferPool(MAX_UPLOAD_BYTES + 1)
+
+
+def _decode_image(data, label: str) -> np.ndarray:
     arr = np.frombuffer(data, dtype=np.uint8)
     img = cv2.imdecode(arr, cv2.IMREAD_COLOR)
     if img is None:
@@ -372,85 +551,222 @@ def _decode_image(data: bytes, label: str) -> np.ndarray:
     return img
 
 
-def _process_video_job(job_id: str, source_face, tmp_in: str, tmp_out: str,
-                       many_faces: bool, enhance: bool) -> None:
-    """Run video face-swap in a background thread, updating job progress."""
-    try:
-        cap = cv2.VideoCapture(tmp_in)
-        if not cap.isOpened():
-            with JOBS_LOCK:
-                jobs[job_id]["status"] = "failed"
-                jobs[job_id]["error"] = "Could not open target video"
-            return
+def _encode_jpeg(img: np.ndarray) -> bytes:
+    """Encode a BGR image as JPEG, preferring TurboJPEG when available."""
+    if _TURBOJPEG is not None:
+        return _TURBOJPEG.encode(img, quality=JPEG_QUALITY, pixel_format=TJPF_BGR)
+    ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+    if not ok:
+        raise HTTPException(status_code=500, detail="Failed to encode result image")
+    return buf.tobytes()
+
+
+async def _read_image(upload: UploadFile, label: str) -> np.ndarray:
+    """Read an uploaded image into a pooled buffer and decode it."""
+    # SpooledTemporaryFile only has readinto() from Python 3.11
+    readinto = getattr(upload.file, "readinto", None)
+    with _UPLOAD_BUFFERS.borrow() as buf:
+        if buf is None or readinto is None:
+            # Pool exhausted (or no readinto): read just what was uploaded
+            data = await upload.read(MAX_UPLOAD_BYTES + 1)
+            n = len(data)
+        else:
+            n = await run_in_threadpool(readinto, buf)
+            data = memoryview(buf)[:n]
+        if n > MAX_UPLOAD_BYTES:
+            raise HTTPException(
+                status_code=400, detail=f"{label.capitalize()} file exceeds 10 MB limit"
+            )
+        return _decode_image(data, label)
+
+
+def _make_tmp(suffix: str) -> str:
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    return path
+
+
+def _cleanup_job(job_id: str) -> None:
+    """Drop a finished job and delete its temp files."""
+    with JOBS_LOCK:
+        job = jobs.pop(job_id, None)
+    if job is not None:
+        _remove_job_files(job)
 
-        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or 0
-        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
 
-        with JOBS_LOCK:
-            jobs[job_id]["total_frames"] = total
+def _remove_job_files(job: Job) -> None:
+    for path in (job.tmp_in, job.tmp_out):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
 
-        fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-        writer = cv2.VideoWriter(tmp_out, fourcc, fps, (width, height))
-        if not writer.isOpened():
-            cap.release()
-            with JOBS_LOCK:
-                jobs[job_id]["status"] = "failed"
-                jobs[job_id]["error"] = "Failed to create output video writer"
-            return
 
-        enhance_fn = None
-        if enhance:
-            try:
-                from modules.processors.frame.face_enhancer import enhance_face
-                enhance_fn = enhance_face
-            except Exception:
-                pass
+def _swap_frame(source_face, frame: np.ndarray, many_faces: bool, enhance_fn,
+                detected: list | None = None) -> np.ndarray:
+    """Swap (and optionally enhance) a single video frame.
 
-        processed = 0
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
+    ``detected`` holds faces from a batched detector call; when None the
+    frame is analysed here.
+    """
+    if many_faces:
+        faces = get_many_faces(frame) if detected is None else detected
+        for tf in faces or ():
+            frame = swap_face(source_face, tf, frame)
+    else:
+        # Single-face path swaps directly, no per-frame list to wrap one face
+        if detected is None:
+            one = get_one_face(frame)
+        else:
+            # Same pick as get_one_face(): left-most face
+            one = min(detected, key=lambda f: f.bbox[0]) if detected else None
+        if one:
+            frame = swap_face(source_face, one, frame)
 
-            if many_faces:
-                faces = get_many_faces(frame)
-            else:
-                one = get_one_face(frame)
-                faces = [one] if one else None
+    if enhance_fn is not None:
+        frame = enhance_fn(frame)
+    return frame
 
-            if faces:
-                for tf in faces:
-                    frame = swap_face(source_face, tf, frame)
 
-            if enhance_fn is not None:
-                frame = enhance_fn(frame)
+def _swap_video_frames(job: Job, cap, writer, shape: tuple[int, int, int], source_face,
+                       many_faces: bool, enhance: bool) -> None:
+    """Decode, swap and encode every *shape*-sized frame from *cap* to *writer*."""
+    enhance_fn = _ENHANCE_FN if enhance else None
+
+    # Frames are swapped concurrently but written strictly in read order:
+    # futures go into a bounded FIFO in read order and a dedicated writer
+    # thread resolves them one by one, so the job thread never blocks on
+    # encoding and the queue bound caps frames held in memory.
+    write_q: queue.Queue[tuple[Future, np.ndarray | None] | None] = queue.Queue(
+        maxsize=VIDEO_WORKERS * 2
+    )
+    write_errors: list[BaseException] = []
+
+    # With a batch-capable detector, faces for several frames are found in
+    # one inference call here and handed to the workers with each frame.
+    batch_size = DETECT_BATCH if DETECT_BATCH > 1 and detector_supports_batch() else 1
+    batch: list[tuple[np.ndarray, np.ndarray | None]] = []
+
+    # OpenCV can decode into a caller-supplied array, so reuse a fixed set
+    # of buffers (PyAV always allocates). Sized to cover a full detection
+    # batch plus everything queued or being written, so acquire() can't
+    # starve the writer.
+    frame_pool = None
+    if isinstance(cap, cv2.VideoCapture):
+        frame_pool = _FramePool(shape, batch_size + VIDEO_WORKERS * 2 + 4)
+
+    def _write_frames() -> None:
+        # Runs once per frame, so keep the body flat and the lookups local.
+        get, write = write_q.get, writer.write
+        release = frame_pool.release if frame_pool is not None else None
+        processed = 0
+        while (item := get()) is not None:
+            fut, buf = item
+            if write_errors:
+                fut.cancel()
+            else:
+                try:
+                    write(fut.result())
+                except BaseException as exc:
+                    write_errors.append(exc)
+                else:
+                    processed += 1
+                    job.processed_frames = processed
+            if buf is not None:
+                release(buf)
+
+    writer_thread = threading.Thread(target=_write_frames, daemon=True)
+    writer_thread.start()
+    eof = False
+    with ThreadPoolExecutor(max_workers=VIDEO_WORKERS) as pool:
+        submit, put = pool.submit, write_q.put
+        stopping = SHUTTING_DOWN.is_set
+        try:
+            while not eof and not write_errors and not stopping():
+                if frame_pool is not None:
+                    buf = frame_pool.acquire()
+                    ret, frame = cap.read(buf)
+                else:
+                    buf = None
+                    ret, frame = cap.read()
+                if ret:
+                    batch.append((frame, buf))
+                else:
+                    eof = True
+                    if buf is not None:
+                        frame_pool.release(buf)
+                if not batch or (not eof and len(batch) < batch_size):
+                    continue
+
+                if batch_size > 1:
+                    detections = get_many_faces_batch([frame for frame, _ in batch])
+                else:
+                    detections = [None] * len(batch)
+                for (frame, buf), detected in zip(batch, detections):
+                    put((submit(
+                        _swap_frame, source_face, frame, many_faces, enhance_fn, detected
+                    ), buf))
+                batch = []
+        finally:
+            write_q.put(None)
+            writer_thread.join()
+
+    if write_errors:
+        raise write_errors[0]
+    if not eof:
+        raise RuntimeError("Server shut down before the job finished")
+
+
+def _process_video_job(job: Job, source_face, many_faces: bool, enhance: bool) -> None:
+    """Run video face-swap in a background thread, updating job progress."""
+    try:
+        cap = open_reader(job.tmp_in)
+        try:
+            if not cap.isOpened():
+                job.fail("Could not open target video")
+                return
 
-            writer.write(frame)
-            processed += 1
+            total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or 0
+            fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
 
-            with JOBS_LOCK:
-                jobs[job_id]["processed_frames"] = processed
+            job.total_frames = total
 
-        cap.release()
-        writer.release()
+            writer = open_writer(job.tmp_out, fps, (width, height))
+            if not writer.isOpened():
+                job.fail("Failed to create output video writer")
+                return
+
+            try:
+                _swap_video_frames(
+                    job, cap, writer, (height, width, 3), source_face, many_faces, enhance
+                )
+            except BaseException:
+                # Still close the writer (ffmpeg's stdin) so its process
+                # exits now; the original error is the one to report
+                try:
+                    writer.release()
+                except Exception:
+                    pass
+                raise
+            writer.release()
+        finally:
+            cap.release()
+        processed = job.processed_frames
 
         if processed == 0:
-            with JOBS_LOCK:
-                jobs[job_id]["status"] = "failed"
-                jobs[job_id]["error"] = "Video contained no readable frames"
+            job.fail("Video contained no readable frames")
             return
 
-        with JOBS_LOCK:
-            jobs[job_id]["processed_frames"] = processed
-            jobs[job_id]["status"] = "done"
-            jobs[job_id]["finished_at"] = time.time()
+        job.finish()
 
     except Exception as exc:
-        with JOBS_LOCK:
-            jobs[job_id]["status"] = "failed"
-            jobs[job_id]["error"] = str(exc)
+        job.fail(str(exc))
+    finally:
+        # Shutdown skipped this job's files while it was running
+        if SHUTTING_DOWN.is_set():
+            _remove_job_files(job)
 
 
 # ---------------------------------------------------------------------------
@@ -459,8 +775,8 @@ def _process_video_job(job_id: str, source_face, tmp_in: str, tmp_out: str,
 
 @app.get("/health")
 async def health():
-    swapper_loaded = get_face_swapper() is not None
-    analyser_loaded = get_face_analyser() is not None
+    swapper_loaded = _SWAPPER is not None
+    analyser_loaded = _ANALYSER is not None
     models_dir = os.path.join(os.path.dirname(__file__), "models")
     swapper_model = os.path.join(models_dir, "inswapper_128.onnx")
     enhancer_model = os.path.join(models_dir, "GFPGANv1.4.pth")
@@ -488,16 +804,8 @@ async def swap(
     many_faces: bool = Query(False),
     enhance: bool = Query(False),
 ):
-    source_bytes = await source.read()
-    if len(source_bytes) > MAX_UPLOAD_BYTES:
-        raise HTTPException(status_code=400, detail="Source file exceeds 10 MB limit")
-
-    target_bytes = await target.read()
-    if len(target_bytes) > MAX_UPLOAD_BYTES:
-        raise HTTPException(status_code=400, detail="Target file exceeds 10 MB limit")
-
-    source_img = _decode_image(source_bytes, "source")
-    target_img = _decode_image(target_bytes, "target")
+    source_img = await _read_image(source, "source")
+    target_img = await _read_image(target, "target")
 
     source_face = get_one_face(source_img)
     if source_face is None:
@@ -522,16 +830,13 @@ async def swap(
 
     if enhance:
         try:
-            from modules.processors.frame.face_enhancer import enhance_face
-            result = enhance_face(result)
+            if _ENHANCE_FN is None:
+                raise RuntimeError("face enhancer is not available")
+            result = _ENHANCE_FN(result)
         except Exception as exc:
             raise HTTPException(status_code=500, detail=f"Face enhancement failed: {exc}")
 
-    ok, buf = cv2.imencode(".jpg", result)
-    if not ok:
-        raise HTTPException(status_code=500, detail="Failed to encode result image")
-
-    return StreamingResponse(io.BytesIO(buf.tobytes()), media_type="image/jpeg")
+    return StreamingResponse(io.BytesIO(_encode_jpeg(result)), media_type="image/jpeg")
 
 
 @app.post("/swap/video")
@@ -541,91 +846,106 @@ async def swap_video(
     many_faces: bool = Query(False),
     enhance: bool = Query(False),
 ):
-    source_bytes = await source.read()
-    if len(source_bytes) > MAX_UPLOAD_BYTES:
-        raise HTTPException(status_code=400, detail="Source file exceeds 10 MB limit")
-
-    target_bytes = await target.read()
-    if len(target_bytes) > MAX_VIDEO_BYTES:
-        raise HTTPException(status_code=400, detail="Target video exceeds 100 MB limit")
-
-    source_img = _decode_image(source_bytes, "source")
+    with JOBS_LOCK:
+        active = sum(1 for job in jobs.values() if job.status == "processing")
+    if active >= MAX_PENDING_JOBS:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many video jobs in progress, try again later",
+            headers={"Retry-After": "30"},
+        )
+
+    source_img = await _read_image(source, "source")
     source_face = get_one_face(source_img)
     if source_face is None:
         raise HTTPException(status_code=400, detail="No face detected in source image")
+    # swap_face() silently returns the frame untouched without an embedding;
+    # fail here rather than produce an unswapped video.
+    if getattr(source_face, "normed_embedding", None) is None:
+        raise HTTPException(status_code=500, detail="Could not compute source face embedding")
 
     suffix = os.path.splitext(target.filename or "video.mp4")[1] or ".mp4"
-    tmp_in = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
-    tmp_out = tempfile.NamedTemporaryFile(suffix=".mp4", delete=False)
-    tmp_in.write(target_bytes)
-    tmp_in.close()
-    tmp_out.close()
+    tmp_in = await run_in_threadpool(_make_tmp, suffix)
+    tmp_out = await run_in_threadpool(_make_tmp, ".mp4")
+    try:
+        await save_upload(target, tmp_in, MAX_VIDEO_BYTES, "Target video exceeds 100 MB limit")
+    except BaseException:
+        # save_upload already removed tmp_in
+        try:
+            os.unlink(tmp_out)
+        except OSError:
+            pass
+        raise
 
     job_id = uuid.uuid4().hex[:12]
+    job = Job(tmp_in=tmp_in, tmp_out=tmp_out)
     with JOBS_LOCK:
-        jobs[job_id] = {
-            "status": "processing",
-            "total_frames": 0,
-            "processed_frames": 0,
-            "error": None,
-            "tmp_in": tmp_in.name,
-            "tmp_out": tmp_out.name,
-            "created_at": time.time(),
-            "finished_at": None,
-        }
-
-    thread = threading.Thread(
-        target=_process_video_job,
-        args=(job_id, source_face, tmp_in.name, tmp_out.name, many_faces, enhance),
-        daemon=True,
+        jobs[job_id] = job
+
+    job.future = app.state.video_pool.submit(
+        _process_video_job, job, source_face, many_faces, enhance
     )
-    thread.start()
 
     return {"job_id": job_id}
 
 
+def _job_state(job: Job) -> dict:
+    return {
+        "status": job.status,
+        "total_frames": job.total_frames,
+        "processed_frames": job.processed_frames,
+        "error": job.error,
+    }
+
+
 @app.get("/job/{job_id}")
 async def job_status(job_id: str):
-    with JOBS_LOCK:
-        job = jobs.get(job_id)
+    job = jobs.get(job_id)
     if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
-    return {
-        "status": job["status"],
-        "total_frames": job["total_frames"],
-        "processed_frames": job["processed_frames"],
-        "error": job["error"],
-    }
+    return _job_state(job)
+
+
+@app.get("/job/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    """Stream job progress as Server-Sent Events until the job finishes."""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def stream():
+        last = None
+        while True:
+            state = _job_state(job)
+            if state != last:
+                yield b"data: " + orjson.dumps(state) + b"\n\n"
+                last = state
+            if state["status"] != "processing" or await request.is_disconnected():
+                return
+            await asyncio.sleep(JOB_EVENT_INTERVAL)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
 
 
 @app.get("/job/{job_id}/download")
 async def job_download(job_id: str):
-    with JOBS_LOCK:
-        job = jobs.get(job_id)
+    job = jobs.get(job_id)
     if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
-    if job["status"] != "done":
-        raise HTTPException(status_code=400, detail=f"Job is not done (status: {job['status']})")
+    if job.status != "done":
+        raise HTTPException(status_code=400, detail=f"Job is not done (status: {job.status})")
 
-    tmp_out = job["tmp_out"]
+    tmp_out = job.tmp_out
     if not os.path.exists(tmp_out):
         raise HTTPException(status_code=500, detail="Result file missing")
 
-    with open(tmp_out, "rb") as f:
-        video_bytes = f.read()
-
-    # Cleanup temp files after download
-    for path in (job.get("tmp_in"), job.get("tmp_out")):
-        if path:
-            try:
-                os.unlink(path)
-            except OSError:
-                pass
-    with JOBS_LOCK:
-        jobs.pop(job_id, None)
-
-    return StreamingResponse(
-        io.BytesIO(video_bytes),
+    return FileResponse(
+        tmp_out,
         media_type="video/mp4",
-        headers={"Content-Disposition": "attachment; filename=result.mp4"},
+        filename="result.mp4",
+        background=BackgroundTask(_cleanup_job, job_id),
     )
@@ -1,6 +1,6 @@
 import os
 import shutil
-from typing import Any
+from typing import Any, List
 import insightface
 import threading
 
@@ -8,7 +8,7 @@ import cv2
 import numpy as np
 import modules.globals
 from tqdm import tqdm
-from modules.typing import Frame
+from modules.typing import Face, Frame
 from modules.cluster_analysis import find_cluster_centroids, find_closest_centroid
 from modules.utilities import get_temp_directory_path, create_temp, extract_frames, clean_temp, get_temp_frame_paths
 from pathlib import Path
@@ -47,6 +47,99 @@ def get_many_faces(frame: Frame) -> Any:
     except IndexError:
         return None
 
+def detector_supports_batch() -> bool:
+    """True if the detection model accepts more than one image per inference call."""
+    det_model = get_face_analyser().det_model
+    batch_dim = det_model.session.get_inputs()[0].shape[0]
+    return not isinstance(batch_dim, int) and det_model.input_size is not None
+
+
+def _letterbox(frame: Frame, input_size: tuple) -> tuple:
+    """Resize a frame into the detector input the same way insightface's detect() does."""
+    im_ratio = float(frame.shape[0]) / frame.shape[1]
+    model_ratio = float(input_size[1]) / input_size[0]
+    if im_ratio > model_ratio:
+        new_height = input_size[1]
+        new_width = int(new_height / im_ratio)
+    else:
+        new_width = input_size[0]
+        new_height = int(new_width * im_ratio)
+    det_img = np.zeros((input_size[1], input_size[0], 3), dtype=np.uint8)
+    det_img[:new_height, :new_width, :] = cv2.resize(frame, (new_width, new_height))
+    return det_img, float(new_height) / frame.shape[0]
+
+
+def _decode_detections(det_model: Any, net_outs: list, input_size: tuple, det_scale: float) -> tuple:
+    """Turn one image's raw detector outputs into (bboxes+scores, kpss), as detect() does."""
+    from insightface.model_zoo.retinaface import distance2bbox, distance2kps
+
+    fmc = det_model.fmc
+    scores_list, bboxes_list, kpss_list = [], [], []
+    for idx, stride in enumerate(det_model._feat_stride_fpn):
+        scores = net_outs[idx]
+        bbox_preds = net_outs[idx + fmc] * stride
+        height, width = input_size[1] // stride, input_size[0] // stride
+        key = (height, width, stride)
+        anchor_centers = det_model.center_cache.get(key)
+        if anchor_centers is None:
+            anchor_centers = np.stack(np.mgrid[:height, :width][::-1], axis=-1).astype(np.float32)
+            anchor_centers = (anchor_centers * stride).reshape((-1, 2))
+            if det_model._num_anchors > 1:
+                anchor_centers = np.stack([anchor_centers] * det_model._num_anchors, axis=1).reshape((-1, 2))
+        pos_inds = np.where(scores >= det_model.det_thresh)[0]
+        scores_list.append(scores[pos_inds])
+        bboxes_list.append(distance2bbox(anchor_centers, bbox_preds)[pos_inds])
+        if det_model.use_kps:
+            kpss = distance2kps(anchor_centers, net_outs[idx + fmc * 2] * stride)
+            kpss_list.append(kpss.reshape((kpss.shape[0], -1, 2))[pos_inds])
+
+    scores = np.vstack(scores_list)
+    order = scores.ravel().argsort()[::-1]
+    pre_det = np.hstack((np.vstack(bboxes_list) / det_scale, scores)).astype(np.float32, copy=False)
+    pre_det = pre_det[order, :]
+    keep = det_model.nms(pre_det)
+    kpss = None
+    if det_model.use_kps:
+        kpss = (np.vstack(kpss_list) / det_scale)[order][keep]
+    return pre_det[keep, :], kpss
+
+
+def get_many_faces_batch(frames: List[Frame]) -> List[List[Face]]:
+    """Detect faces in several frames with a single detector inference call.
+
+    Falls back to per-frame detection when the detection model has a fixed
+    batch size. Landmark/recognition models still run once per face.
+    """
+    if len(frames) < 2 or not detector_supports_batch():
+        return [get_many_faces(frame) or [] for frame in frames]
+
+    analyser = get_face_analyser()
+    det_model = analyser.det_model
+    input_size = det_model.input_size
+    letterboxed = [_letterbox(frame, input_size) for frame in frames]
+    mean = det_model.input_mean
+    blob = cv2.dnn.blobFromImages(
+        [det_img for det_img, _ in letterboxed], 1.0 / det_model.input_std,
+        input_size, (mean, mean, mean), swapRB=True
+    )
+    net_outs = det_model.session.run(det_model.output_names, {det_model.input_name: blob})
+    # Outputs come back either as (B, K, C) or with the batch folded into K
+    net_outs = [out if out.ndim == 3 else out.reshape(len(frames), -1, out.shape[-1]) for out in net_outs]
+
+    results = []
+    for i, frame in enumerate(frames):
+        bboxes, kpss = _decode_detections(det_model, [out[i] for out in net_outs], input_size, letterboxed[i][1])
+        faces = []
+        for j in range(bboxes.shape[0]):
+            face = Face(bbox=bboxes[j, 0:4], kps=None if kpss is None else kpss[j], det_score=bboxes[j, 4])
+            for taskname, model in analyser.models.items():
+                if taskname != 'detection':
+                    model.get(frame, face)
+            faces.append(face)
+        results.append(faces)
+    return results
+
+
 def has_valid_map() -> bool:
     for map in modules.globals.source_target_map:
         if "source" in map and "target" in map:
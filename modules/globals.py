@@ -46,6 +46,8 @@ show_fps: bool = False
 max_memory: int | None = None        # Memory limit in GB? (Needs clarification)
 execution_providers: List[str] = []  # e.g., ['CUDAExecutionProvider', 'CPUExecutionProvider']
 execution_threads: int | None = None # Number of threads for CPU execution
+intra_op_threads: int | None = None  # ONNX Runtime intra-op threads for the swapper session (None = ORT default)
+inference_precision: str | None = None  # Swapper weights: 'fp16' or 'fp32' (None = fp16 on CUDA, else fp32)
 headless: bool | None = None         # Run without UI?
 log_level: str = "error"             # Logging level (e.g., 'debug', 'info', 'warning', 'error')
 
@@ -0,0 +1,89 @@
+"""Headless ML bootstrap shared by the SaaS app (api/) and api_legacy.
+
+Importing this module stubs out ``modules.core`` (which would pull in
+tensorflow), so it must be imported before any ``modules.processors`` code.
+"""
+
+from __future__ import annotations
+
+import platform
+import sys
+import threading
+import types
+from typing import Any
+
+if "modules.core" not in sys.modules:
+    _core_stub = types.ModuleType("modules.core")
+
+    def _update_status(message: str, scope: str = "DLC.API") -> None:
+        print(f"[{scope}] {message}")
+
+    _core_stub.update_status = _update_status  # type: ignore[attr-defined]
+    sys.modules["modules.core"] = _core_stub
+
+_WARMED = False
+_warm_lock = threading.Lock()
+
+
+def configure_globals(precision: str | None = None) -> None:
+    """Set modules.globals for headless API mode.
+
+    ``precision`` selects the swapper weights ("fp16"/"fp32"); None keeps
+    the provider-based default.
+    """
+    import modules.globals
+
+    modules.globals.headless = True
+    modules.globals.many_faces = False
+    modules.globals.map_faces = False
+    modules.globals.mouth_mask = False
+    modules.globals.poisson_blend = False
+    modules.globals.inference_precision = precision or None
+
+    if platform.system() == "Darwin" and platform.machine() == "arm64":
+        modules.globals.execution_providers = [
+            "CoreMLExecutionProvider",
+            "CPUExecutionProvider",
+        ]
+    else:
+        modules.globals.execution_providers = ["CPUExecutionProvider"]
+
+
+def warm_models(precision: str | None = None) -> tuple[Any, Any]:
+    """Load the face analyser and swapper, once per process.
+
+    Returns ``(analyser, swapper)``; either may be None if loading failed.
+    Later calls (e.g. from a second app's lifespan) reuse the cached sessions.
+    """
+    global _WARMED
+    from modules.face_analyser import get_face_analyser
+    from modules.processors.frame.face_swapper import get_face_swapper
+
+    with _warm_lock:
+        if not _WARMED:
+            configure_globals(precision)
+            _run_dummy_inference(get_face_analyser(), get_face_swapper())
+            _WARMED = True
+    return get_face_analyser(), get_face_swapper()
+
+
+def _run_dummy_inference(analyser: Any, swapper: Any) -> None:
+    """Push one blank input through each model.
+
+    ONNX Runtime finishes provider setup (CUDA/CoreML kernels, memory
+    arenas) on the first run, so doing it here keeps that cost off the
+    first request.
+    """
+    import numpy as np
+
+    try:
+        if analyser is not None:
+            analyser.get(np.zeros((256, 256, 3), dtype=np.uint8))
+        if swapper is not None:
+            width, height = swapper.input_size
+            swapper.session.run(swapper.output_names, {
+                swapper.input_names[0]: np.zeros((1, 3, height, width), dtype=np.float32),
+                swapper.input_names[1]: np.zeros((1, 512), dtype=np.float32),
+            })
+    except Exception as exc:
+        print(f"[DLC.API] Warm-up inference skipped: {exc}")
@@ -69,15 +69,31 @@ def pre_start() -> bool:
     return True
 
 
+def _swapper_model_name() -> str:
+    """Pick the inswapper weights matching modules.globals.inference_precision.
+
+    Defaults to FP16 on CUDA and FP32 elsewhere (CPU kernels mostly lack
+    FP16 and would insert casts); FP16 falls back to FP32 if not downloaded.
+    """
+    precision = modules.globals.inference_precision
+    if precision is None:
+        precision = "fp16" if "CUDAExecutionProvider" in modules.globals.execution_providers else "fp32"
+    if precision == "fp16" and os.path.exists(os.path.join(models_dir, "inswapper_128_fp16.onnx")):
+        return "inswapper_128_fp16.onnx"
+    return "inswapper_128.onnx"
+
+
 def get_face_swapper() -> Any:
     global FACE_SWAPPER
 
+    # Fast path: swap_face() calls this for every face, so once the model is
+    # loaded don't serialize concurrent callers on the lock.
+    if FACE_SWAPPER is not None:
+        return FACE_SWAPPER
+
     with THREAD_LOCK:
         if FACE_SWAPPER is None:
-            model_name = "inswapper_128.onnx"
-            if "CUDAExecutionProvider" in modules.globals.execution_providers:
-                model_name = "inswapper_128_fp16.onnx"
-            model_path = os.path.join(models_dir, model_name)
+            model_path = os.path.join(models_dir, _swapper_model_name())
             update_status(f"Loading face swapper model from: {model_path}", NAME)
             try:
                 # Optimized provider configuration for Apple Silicon
@@ -100,10 +116,23 @@ def get_face_swapper() -> Any:
                     else:
                         providers_config.append(p)
                 
-                FACE_SWAPPER = insightface.model_zoo.get_model(
-                    model_path,
-                    providers=providers_config,
-                )
+                if modules.globals.intra_op_threads:
+                    # insightface's get_model() can't take SessionOptions, so
+                    # build the session here when the thread count is pinned.
+                    import onnxruntime
+                    from insightface.model_zoo.inswapper import INSwapper
+
+                    session_options = onnxruntime.SessionOptions()
+                    session_options.intra_op_num_threads = modules.globals.intra_op_threads
+                    session = onnxruntime.InferenceSession(
+                        model_path, sess_options=session_options, providers=providers_config
+                    )
+                    FACE_SWAPPER = INSwapper(model_file=model_path, session=session)
+                else:
+                    FACE_SWAPPER = insightface.model_zoo.get_model(
+                        model_path,
+                        providers=providers_config,
+                    )
                 update_status("Face swapper model loaded successfully.", NAME)
             except Exception as e:
                 update_status(f"Error loading face swapper model: {e}", NAME)
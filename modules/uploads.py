@@ -0,0 +1,36 @@
+"""Upload streaming shared by the SaaS app (api/) and api_legacy."""
+
+from __future__ import annotations
+
+import os
+
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+
+UPLOAD_CHUNK_BYTES = 1024 * 1024  # read size when streaming uploads to disk
+
+
+async def save_upload(upload: UploadFile, path: str, limit: int, detail: str) -> None:
+    """Stream an upload to *path* chunk by chunk, enforcing *limit* as it goes.
+
+    Disk I/O runs in the threadpool so a large upload never blocks the event
+    loop for other requests. On any failure, including the size limit, the
+    partial file is removed before the exception propagates.
+    """
+    try:
+        f = await run_in_threadpool(open, path, "wb")
+        try:
+            total = 0
+            while chunk := await upload.read(UPLOAD_CHUNK_BYTES):
+                total += len(chunk)
+                if total > limit:
+                    raise HTTPException(status_code=400, detail=detail)
+                await run_in_threadpool(f.write, chunk)
+        finally:
+            await run_in_threadpool(f.close)
+    except BaseException:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,159 @@
+"""Video decode/encode helpers shared by the job queue and api_legacy.
+
+Decoding prefers PyAV (frame threading, plus NVDEC/VideoToolbox when the
+matching accelerator is in use) and encoding pipes raw frames to an ffmpeg
+H.264 encoder (NVENC/VideoToolbox/libx264). Both fall back to OpenCV, so
+the readers and writers returned here mimic cv2.VideoCapture/VideoWriter.
+"""
+
+from __future__ import annotations
+
+import platform
+import shutil
+import subprocess
+
+import cv2
+import numpy as np
+
+import modules.globals
+
+# Optional: PyAV decodes with frame threading (and NVDEC/VideoToolbox if present)
+try:
+    import av
+except ImportError:
+    av = None
+
+# Output is piped to ffmpeg as raw BGR when available; mp4v via OpenCV otherwise.
+FFMPEG_BIN = shutil.which("ffmpeg")
+_h264_encoder: str | None = None  # resolved once by pick_encoder(); "" = none
+
+
+def pick_encoder() -> str:
+    """Return the best available ffmpeg H.264 encoder, or "" if there is none."""
+    global _h264_encoder
+    if _h264_encoder is not None:
+        return _h264_encoder
+
+    available = ""
+    if FFMPEG_BIN:
+        try:
+            available = subprocess.run(
+                [FFMPEG_BIN, "-hide_banner", "-encoders"],
+                capture_output=True, text=True, timeout=10,
+            ).stdout
+        except (OSError, subprocess.SubprocessError):
+            pass
+
+    # Hardware encoders are often compiled in without the hardware present,
+    # so only pick them when the matching accelerator is actually in use.
+    candidates = []
+    if "CUDAExecutionProvider" in modules.globals.execution_providers:
+        candidates.append("h264_nvenc")
+    if platform.system() == "Darwin":
+        candidates.append("h264_videotoolbox")
+    candidates.append("libx264")
+
+    _h264_encoder = next((c for c in candidates if f" {c} " in available), "")
+    return _h264_encoder
+
+
+class _PyAVReader:
+    """Minimal cv2.VideoCapture stand-in that decodes with PyAV."""
+
+    def __init__(self, path: str) -> None:
+        self._container = None
+        try:
+            self._container = av.open(path, **_hwaccel_kwargs())
+            stream = self._container.streams.video[0]
+        except (av.error.FFmpegError, IndexError):
+            self.release()
+            return
+        stream.thread_type = "AUTO"
+        self._frames = self._container.decode(stream)
+        self._props = {
+            cv2.CAP_PROP_FRAME_COUNT: stream.frames,
+            cv2.CAP_PROP_FPS: float(stream.average_rate or 0),
+            cv2.CAP_PROP_FRAME_WIDTH: stream.codec_context.width,
+            cv2.CAP_PROP_FRAME_HEIGHT: stream.codec_context.height,
+        }
+
+    def isOpened(self) -> bool:
+        return self._container is not None
+
+    def get(self, prop: int) -> float:
+        return self._props.get(prop, 0)
+
+    def read(self) -> tuple[bool, np.ndarray | None]:
+        try:
+            frame = next(self._frames)
+        except (StopIteration, av.error.FFmpegError):
+            return False, None
+        return True, frame.to_ndarray(format="bgr24")
+
+    def release(self) -> None:
+        if self._container is not None:
+            self._container.close()
+            self._container = None
+
+
+def _hwaccel_kwargs() -> dict:
+    """Hardware decode options for av.open(), if this PyAV build supports them."""
+    if "CUDAExecutionProvider" in modules.globals.execution_providers:
+        device = "cuda"
+    elif platform.system() == "Darwin":
+        device = "videotoolbox"
+    else:
+        return {}
+    try:
+        from av.codec.hwaccel import HWAccel  # PyAV >= 14
+    except ImportError:
+        return {}
+    return {"hwaccel": HWAccel(device_type=device, allow_software_fallback=True)}
+
+
+def open_reader(path: str):
+    if av is not None:
+        reader = _PyAVReader(path)
+        if reader.isOpened():
+            return reader
+    return cv2.VideoCapture(path)
+
+
+class _FFmpegWriter:
+    """Minimal cv2.VideoWriter stand-in that pipes raw BGR frames to ffmpeg."""
+
+    def __init__(self, path: str, fps: float, size: tuple[int, int], encoder: str) -> None:
+        width, height = size
+        cmd = [
+            FFMPEG_BIN, "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgr24",
+            "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+            "-c:v", encoder,
+        ]
+        if encoder == "libx264":
+            cmd += ["-preset", "ultrafast"]
+        # yuv420p needs even dimensions
+        cmd += ["-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-pix_fmt", "yuv420p", path]
+        self._proc = subprocess.Popen(
+            cmd, stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+
+    def isOpened(self) -> bool:
+        return self._proc.poll() is None
+
+    def write(self, frame: np.ndarray) -> None:
+        self._proc.stdin.write(np.ascontiguousarray(frame).data)
+
+    def release(self) -> None:
+        if self._proc.stdin and not self._proc.stdin.closed:
+            self._proc.stdin.close()
+        if self._proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg exited with code {self._proc.returncode}")
+
+
+def open_writer(path: str, fps: float, size: tuple[int, int]):
+    encoder = pick_encoder()
+    if encoder:
+        return _FFmpegWriter(path, fps, size, encoder)
+    return cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, size)